@@ -0,0 +1,175 @@
+"""
+Benchmark the phases of the offline browser creation on synthetic datasets of several scales.
+
+Run from the repository root, with the package installed:
+
+    python benchmarks/run.py [--scale small] [--update-baselines]
+
+Wall time and peak memory (as traced by `tracemalloc`) of each phase are compared against the
+baselines stored in `baselines.json`. Since tracing slows down allocations considerably, each scale
+is benchmarked twice: Once to measure wall time, and once with tracing to measure memory.
+
+The exit status is 1 if any phase exceeds its baseline by more than the tolerance. Since timings
+depend on the machine, baselines should be updated when benchmarking on a different machine - and
+before making the change to be benchmarked.
+"""
+import sys
+import json
+import time
+import logging
+import pathlib
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from typing import Optional
+
+from pycldf import Dataset
+
+from cldfofflinebrowser import osmtiles
+from cldfofflinebrowser.create import Data
+from cldfofflinebrowser.output import DirectorySink, MemorySink
+from cldfofflinebrowser.synthetic import Scale, StubTileServer, write_wordlist
+from cldfofflinebrowser.template import render_directories
+from cldfofflinebrowser.build import build
+
+BASELINES = pathlib.Path(__file__).parent / 'baselines.json'
+
+SCALES = {
+    'small': Scale(languages=100, parameters=200, forms=5000, media=500, spread=20),
+    'medium': Scale(languages=500, parameters=1000, forms=50000, media=5000, spread=40),
+    'large': Scale(languages=2000, parameters=2000, forms=200000, media=20000, spread=90),
+}
+MAX_ZOOM = 7
+PADDING = 8
+
+
+class Phases:
+    """Time the phases of a benchmark run, or - with `trace` - measure their peak memory."""
+    def __init__(self, trace: bool = False, results: Optional[dict] = None):
+        self.trace = trace
+        self.results = {} if results is None else results
+
+    @contextlib.contextmanager
+    def __call__(self, name):
+        if self.trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        measures = self.results.setdefault(name, {})
+        if self.trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            measures['peak_mb'] = round(peak / 2**20, 1)
+            print(f'  {name:<10} {peak / 2**20:8.1f}MB', file=sys.stderr)
+        else:
+            measures['seconds'] = round(seconds, 3)
+            print(f'  {name:<10} {seconds:8.2f}s', file=sys.stderr)
+
+
+def benchmark(scale: Scale, tmp: pathlib.Path, phase: Phases) -> dict:
+    """Run the phases of the offline command on a synthetic dataset of a given scale."""
+    log = logging.getLogger('benchmark')
+
+    with phase('generate'):
+        metadata = write_wordlist(tmp / 'cldf', scale)
+    cldf = Dataset.from_metadata(metadata)
+
+    with phase('parse'):
+        data = Data.from_dataset(cldf, with_audio=True, log=log)
+
+    with phase('audio'):
+        # Determines the paths of audio files in the offline browser, required for page data.
+        list(data.iter_missing_audio(cldf, MemorySink()))
+
+    with phase('group'):
+        by_parameter = list(data.iter_forms_by_parameter())
+        by_language = list(data.iter_forms_by_language())
+
+    with phase('page_data'):
+        pages = [
+            ('parameter', pid, data.parameters[pid], data.parameter_page_data(forms, MAX_ZOOM))
+            for pid, forms in by_parameter]
+        pages.extend(
+            ('language', lid, data.languages[lid], data.language_page_data(forms))
+            for lid, forms in by_language)
+
+    with phase('render'):
+        render_directories(
+            DirectorySink(tmp / 'render'), pages, MAX_ZOOM, data.template_context,
+            progress=lambda things, **_: things)
+
+    coords = [(lang['latitude'], lang['longitude']) for lang in data.languages.values()]
+    with phase('tile_list'):
+        osmtiles.get_tile_list(0, MAX_ZOOM, osmtiles.get_bounding_box(coords), PADDING)
+
+    with phase('tiles'):
+        osmtiles.download_tiles(
+            None, MemorySink(), coords, MAX_ZOOM, PADDING,
+            progress=lambda things, **_: things, workers=4, server_class=StubTileServer)
+
+    with phase('build'):
+        build(
+            cldf,
+            DirectorySink(tmp / 'build'),
+            argparse.Namespace(
+                include=None, with_audio=True, log=log, tiles=None, max_zoom=MAX_ZOOM,
+                padding=PADDING, jobs=1, download_jobs=4, chunk_size=0))
+    return phase.results
+
+
+def compare(results: dict, baselines: dict, tolerance: float) -> list[str]:
+    """Compare benchmark results with baselines, returning descriptions of regressions."""
+    regressions = []
+    for scale, phases in results.items():
+        for name, measures in phases.items():
+            for measure, value in measures.items():
+                baseline = baselines.get(scale, {}).get(name, {}).get(measure)
+                if baseline and value > baseline * (1 + tolerance):
+                    regressions.append(
+                        f'{scale} {name} {measure}: {value} > {baseline} (+{tolerance:.0%})')
+    return regressions
+
+
+def main(args=None):  # pylint: disable=C0116
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--scale',
+        action='append',
+        choices=list(SCALES),
+        help='Scale to benchmark, may be given multiple times (default: all).')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.5,
+        help='Relative increase over the baseline which is reported as regression.')
+    parser.add_argument(
+        '--update-baselines',
+        action='store_true',
+        default=False,
+        help=f'Store the results as new baselines in {BASELINES.name}.')
+    args = parser.parse_args(args)
+
+    results = {}
+    for scale in args.scale or SCALES:
+        results[scale] = {}
+        for trace in [False, True]:
+            print(f"{scale} ({'memory' if trace else 'time'}): {SCALES[scale]}", file=sys.stderr)
+            with tempfile.TemporaryDirectory() as tmp:
+                benchmark(SCALES[scale], pathlib.Path(tmp), Phases(trace, results[scale]))
+
+    baselines = json.loads(BASELINES.read_text(encoding='utf8')) if BASELINES.exists() else {}
+    if args.update_baselines:
+        baselines.update(results)
+        BASELINES.write_text(json.dumps(baselines, indent=2) + '\n', encoding='utf8')
+        return 0
+
+    regressions = compare(results, baselines, args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}', file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Bundling of the static assets of the offline browser.
+
+The Javascript and CSS files are concatenated into one bundle each, so pages load two files rather
+than nine. Bundles are named by a hash of their content, thus they only need to be written to an
+output if their content changed.
+
+Files which aren't minified already are minified conservatively: Comments and whitespace are
+removed, where this cannot change the meaning of the code.
+"""
+import re
+import hashlib
+import pathlib
+import functools
+
+import cldfofflinebrowser
+
+__all__ = ['BUNDLES', 'ASSETS', 'minify_css', 'minify_js', 'static_files', 'bundle_names']
+
+STATIC_DIR = pathlib.Path(cldfofflinebrowser.__file__).parent / 'static'
+
+# The files to bundle, in the order in which they must be loaded.
+BUNDLES = {
+    'css': ['leaflet.css', 'leaflet.fullscreen.css', 'bootstrap.min.css', 'project.css'],
+    'js': [
+        'leaflet.js',
+        'Leaflet.fullscreen.js',
+        'jquery-3.5.1.min.js',
+        'bootstrap.bundle.min.js',
+        'offline.js',
+    ],
+}
+# Files which are already minified.
+MINIFIED = {'leaflet.js', 'jquery-3.5.1.min.js', 'bootstrap.bundle.min.js', 'bootstrap.min.css'}
+# Files referenced from the bundles, e.g. images in CSS rules.
+ASSETS = ['fullscreen.png', 'fullscreen@2x.png']
+
+
+def minify_css(css: str) -> str:
+    """Remove comments - except for /*! ... */ license comments - and superfluous whitespace."""
+    css = re.sub(r'/\*(?!!).*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_js(js: str) -> str:
+    """
+    Remove indentation, empty lines and lines containing only a // comment.
+
+    Line breaks are kept, to not interfere with automatic semicolon insertion.
+
+    Notes: This assumes there are no multi-line template literals.
+    """
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+def _bundle(suffix: str) -> bytes:
+    minify = minify_css if suffix == 'css' else minify_js
+    parts = []
+    for name in BUNDLES[suffix]:
+        text = STATIC_DIR.joinpath(name).read_text(encoding='utf8')
+        parts.append(text.strip() if name in MINIFIED else minify(text))
+    # Javascript files are separated by semicolons, to make sure statements are terminated.
+    return ('\n' if suffix == 'css' else ';\n').join(parts).encode('utf8')
+
+
+@functools.lru_cache(maxsize=None)
+def static_files() -> dict[str, bytes]:
+    """
+    The static files of the offline browser, keyed by path relative to the root of the browser.
+    """
+    res = {}
+    for suffix in BUNDLES:
+        content = _bundle(suffix)
+        res[f'static/bundle.{hashlib.sha256(content).hexdigest()[:12]}.{suffix}'] = content
+    for name in ASSETS:
+        res[f'static/{name}'] = STATIC_DIR.joinpath(name).read_bytes()
+    return res
+
+
+def bundle_names() -> dict[str, str]:
+    """The paths of the bundles, keyed by suffix (i.e. "js" or "css")."""
+    return {
+        path.split('.')[-1]: path for path in static_files() if path.startswith('static/bundle.')}
@@ -0,0 +1,131 @@
+"""
+Build the offline browser for a CLDF dataset.
+"""
+from typing import Optional
+
+from cldfofflinebrowser import osmtiles
+from cldfofflinebrowser.template import (
+    render_directory, render_directories, render_navigation, render_shared_data,
+)
+from cldfofflinebrowser import output
+from cldfofflinebrowser import pipeline
+from cldfofflinebrowser import search
+from cldfofflinebrowser.create import Data
+from cldfofflinebrowser.stats import Stats
+from cldfofflinebrowser.resources import Resources
+
+__all__ = ['build', 'render_pages']
+
+
+def build(
+        cldf,
+        sink: output.Sink,
+        args,
+        stats: Optional[Stats] = None,
+        resources: Optional[Resources] = None,
+):
+    """
+    Create the offline browser for a CLDF dataset, writing the files to `sink`.
+
+    After reading the data, adding static files, map tiles and audio files from `resources` and
+    rendering the pages run concurrently. Statistics about these phases are collected in `stats`.
+    """
+    stats = stats or Stats(count_output=False)
+    resources = resources or Resources()
+
+    # reading the cldf data
+    with stats.phase('parse') as phase:
+        data = Data.from_dataset(cldf, args.include, args.with_audio, args.log)
+        phase.items = len(data.forms)
+    # Determining the audio file paths must be done before rendering, because pages link to them.
+    with stats.phase('audio_resolution') as phase:
+        download_list = list(phase.count(data.iter_missing_audio(cldf, sink)))
+
+    def counted(progress, phase):
+        return lambda things, total=None: progress(phase.count(things), total=total)
+
+    def copy_static(progress):
+        with stats.phase('static', sink) as phase:
+            resources.remove_stale_static(sink)
+            for path in counted(progress, phase)(resources.static_files()):
+                resources.add_static(phase.sink, path)
+
+    def tiles(progress):
+        with stats.phase('default_tiles', sink) as phase:
+            resources.add_default_tiles(phase.sink)
+        if not args.tiles:
+            return
+        with stats.phase('tile_planning', sink) as phase:
+            todo, phase.items = osmtiles.plan_tiles(
+                phase.sink,
+                [(lang['latitude'], lang['longitude']) for lang in data.languages.values()],
+                args.max_zoom,
+                args.padding)
+        args.log.info('Downloading %s out of %s required tiles.', len(todo), phase.items)
+        with stats.phase('tile_fetch', sink) as phase:
+            resources.add_tiles(
+                args.tiles,
+                phase.sink,
+                todo,
+                progress=counted(progress, phase),
+                workers=args.download_jobs)
+
+    def audio(progress):
+        args.log.info('Downloading %s audio files...', len(download_list))
+        with stats.phase('audio_fetch', sink) as phase:
+            for _ in counted(progress, phase)(
+                    pipeline.bounded_map(
+                        lambda item: resources.add_audio(cldf, phase.sink, *item),
+                        download_list,
+                        args.download_jobs),
+                    total=len(download_list)):
+                pass
+
+    def pages(progress):
+        with stats.phase('page_render', sink) as phase:
+            render_pages(data, phase.sink, args, progress=counted(progress, phase))
+
+    phases = {'static': copy_static, 'tiles': tiles, 'pages': pages}
+    if download_list:
+        phases['audio'] = audio
+    pipeline.run_phases(phases)
+
+
+def render_pages(data: Data, sink: output.Sink, args, progress=None):
+    """
+    Render the pages of the offline browser and the data files they share.
+
+    `progress` wraps the iteration over language and parameter pages.
+    """
+    render_navigation(sink, data.template_context)
+    render_shared_data(sink, 'languages', data.shared_language_data())
+    search.write_index(sink, search.iter_documents(data))
+
+    def iter_pages():
+        for pid, forms in data.iter_forms_by_parameter():
+            yield (
+                'parameter',
+                pid,
+                data.parameters[pid],
+                data.parameter_page_data(forms, args.max_zoom))
+        for lid, forms in data.iter_forms_by_language():
+            yield 'language', lid, data.languages[lid], data.language_page_data(forms)
+
+    render_directories(
+        sink,
+        iter_pages(),
+        args.max_zoom,
+        data.template_context,
+        jobs=args.jobs,
+        chunk_size=args.chunk_size,
+        progress=progress)
+
+    render_directory(
+        sink,
+        'index',
+        None,
+        None,
+        data.index_page_data(args.max_zoom),
+        args.max_zoom,
+        data.template_context,
+        any(p['has_audio'] for p in data.parameters.values()))
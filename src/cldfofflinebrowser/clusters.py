@@ -0,0 +1,56 @@
+"""
+Precomputed clustering of language markers for the zoom levels of the maps.
+
+Languages are clustered on a grid: At each zoom level, languages are grouped by the grid cell they
+fall into, where grid cells are squares of about `CELL_SIZE` pixels on the rendered map.
+"""
+import math
+import collections
+from collections.abc import Iterable
+
+from .osmtiles import Tile, clamp_latitude, wrap_longitude
+
+__all__ = ['CELL_SIZE', 'cluster_pyramid']
+
+# Size of the grid cells in pixels, must be a power of 2 smaller than the tile size of 256 pixels.
+CELL_SIZE = 64
+
+# A cluster is specified as [latitude, longitude, [language IDs]].
+ClusterType = list
+
+
+def _clusters(coords: dict[str, tuple[float, float]], zoom: int) -> list[ClusterType]:
+    # We compute the grid cell as the tile at a higher zoom level.
+    zoom = zoom + int(math.log2(256 // CELL_SIZE))
+    cells = collections.defaultdict(list)
+    for lid, (lat, lon) in coords.items():
+        tile = Tile.from_latlon(clamp_latitude(lat), wrap_longitude(lon), zoom).clamp()
+        cells[(tile.x, tile.y)].append(lid)
+    res = []
+    for _, lids in sorted(cells.items()):
+        res.append([
+            round(sum(coords[lid][0] for lid in lids) / len(lids), 5),
+            round(sum(coords[lid][1] for lid in lids) / len(lids), 5),
+            sorted(lids)])
+    return res
+
+
+def cluster_pyramid(
+        coords: Iterable[tuple[str, tuple[float, float]]],
+        max_zoom: int,
+) -> list[list[ClusterType]]:
+    """
+    Compute clusters of language coordinates for the zoom levels 0 to `max_zoom`.
+
+    Since the clusters do not change anymore once every location is in a cluster of its own, the
+    list of levels is truncated at this zoom level. Thus, the clusters for zoom level `z` are found
+    at index `min(z, len(pyramid) - 1)`.
+    """
+    coords = dict(coords)
+    locations = len(set(coords.values()))
+    res = []
+    for zoom in range(max_zoom + 1):
+        res.append(_clusters(coords, zoom))
+        if len(res[-1]) == locations:
+            break
+    return res
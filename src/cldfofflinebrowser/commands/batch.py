@@ -0,0 +1,78 @@
+"""
+Create offline browseable versions of many CLDF Wordlists in one go.
+
+The builds share static files, one tile server session and caches for map tiles and audio files,
+kept in a shared directory. Files are linked from this directory into the output directories.
+"""
+import re
+import pathlib
+import argparse
+
+from pycldf.cli_util import get_dataset
+from clldutils.clilib import PathType
+
+from cldfofflinebrowser.commands.create import add_build_options
+
+
+def register(parser):  # pylint: disable=C0116
+    parser.add_argument(
+        'batch',
+        metavar='BATCH',
+        help="File listing the datasets to build, one per line as dataset locator and output "
+             "directory (or ZIP archive), separated by a tab - or by whitespace, if the output "
+             "directory contains no spaces. Text after '#' at the start of a line or after "
+             "whitespace is ignored.",
+        type=PathType(type='file'))
+    parser.add_argument(
+        '--download-dir',
+        type=PathType(type='dir'),
+        help='An existing directory to use for downloading datasets (if necessary).',
+        default=None)
+    parser.add_argument(
+        '--shared-dir',
+        help="Directory for the files shared by all builds, i.e. static files and cached map tiles "
+             "and audio files.",
+        type=pathlib.Path,
+        default=pathlib.Path('offline-shared'))
+    parser.add_argument(
+        '--parallel',
+        default=1,
+        help="Number of datasets to build concurrently.",
+        type=int)
+    add_build_options(parser)
+
+
+def iter_batch(p: pathlib.Path):
+    """Yield pairs (dataset locator, output directory) from a batch file."""
+    for lineno, line in enumerate(p.read_text(encoding='utf8').splitlines(), start=1):
+        line = re.sub(r'(^|\s)#.*', '', line).strip()
+        if not line:
+            continue
+        parts = line.split('\t') if '\t' in line else line.rsplit(maxsplit=1)
+        parts = [part.strip() for part in parts]
+        if len(parts) != 2 or not all(parts):
+            raise ValueError(
+                f'{p}:{lineno}: Expected dataset locator and output directory, got "{line}"')
+        yield parts[0], pathlib.Path(parts[1])
+
+
+def run(args):  # pylint: disable=C0116
+    # pylint: disable=import-outside-toplevel
+    from cldfofflinebrowser import output
+    from cldfofflinebrowser import pipeline
+    from cldfofflinebrowser.build import build
+    from cldfofflinebrowser.resources import SharedResources
+
+    batch = list(iter_batch(args.batch))
+
+    with SharedResources(args.shared_dir) as resources:
+        def build_one(item):
+            dataset, outdir = item
+            cldf = get_dataset(argparse.Namespace(dataset=dataset, download_dir=args.download_dir))
+            args.log.info('Building %s in %s', dataset, outdir)
+            with output.get_sink(outdir) as sink:
+                build(cldf, sink, args, resources=resources)
+            return outdir
+
+        for outdir in pipeline.bounded_map(build_one, batch, args.parallel):
+            args.log.info('Done %s', outdir)
@@ -1,25 +1,36 @@
 """
 Create an offline browseable version of a CLDF Wordlist.
 """
-import sys
-import shutil
 import pathlib
 
 from pycldf.cli_util import get_dataset, add_dataset
 from clldutils.clilib import PathType
 
-import cldfofflinebrowser
-from cldfofflinebrowser import osmtiles
-from cldfofflinebrowser.template import render_directory
-from cldfofflinebrowser import media
-from cldfofflinebrowser.create import Data
-
 
 def register(parser):  # pylint: disable=C0116
     parser.add_argument(
         '--outdir',
-        help="Directory in which to create the offline browseable files.",
+        help="Directory in which to create the offline browseable files. If the name ends with "
+             "'.zip', a ZIP archive is created instead.",
         default='offline')
+    add_dataset(parser)
+    add_build_options(parser)
+    parser.add_argument(
+        '--profile',
+        help="Log wall time, items processed, files and bytes written and peak memory for each "
+             "phase of the build. Note that with --jobs > 1 rendered pages are then written by the "
+             "main process.",
+        action='store_true',
+        default=False)
+    parser.add_argument(
+        '--stats-json',
+        help="Write the statistics collected with --profile as JSON to the file specified.",
+        type=pathlib.Path,
+        default=None)
+
+
+def add_build_options(parser):
+    """Add the options controlling a build to a parser."""
     parser.add_argument(
         '--tiles',
         help='Also add map tiles from the mbtiles file specified.',
@@ -35,7 +46,6 @@ def register(parser):  # pylint: disable=C0116
         help="Whitespace separated list of parameter IDs",
         type=lambda s: s.split(),
         default=None)
-    add_dataset(parser)
     parser.add_argument(
         '--padding',
         default=8,
@@ -47,112 +57,43 @@ def register(parser):  # pylint: disable=C0116
         default=10,
         help="Maximal zoom level for which to add map tiles.",
         type=int)
+    parser.add_argument(
+        '--jobs',
+        default=1,
+        help="Number of worker processes to use for rendering the pages.",
+        type=int)
+    parser.add_argument(
+        '--download-jobs',
+        default=4,
+        help="Number of map tiles or audio files to download concurrently.",
+        type=int)
+    parser.add_argument(
+        '--chunk-size',
+        default=0,
+        help="Maximal number of table rows to render on a page. Data of bigger pages is split into "
+             "chunks of this size, which are loaded on demand. 0 means no limit.",
+        type=int)
     #
     # FIXME: configuration? Name of the media FK column?  # pylint: disable=fixme
     # sorting of markers?
     #
 
 
-def _recursive_overwrite(src, dest):
-    """Copy a folder structure overwriting existing files"""
-    if src.is_dir():
-        if not dest.exists():
-            dest.mkdir(parents=True)
-        for f in src.iterdir():
-            _recursive_overwrite(f, dest / f.name)
-    else:
-        shutil.copyfile(str(src), str(dest))
-
-
-def loggable_progress(things, file=sys.stderr):  # pragma: no cover
-    """'Progressbar' that doesn't clog up logs with escape codes.
-
-    Loops over `things` and prints a status update every 10 elements.
-    Writes status updates to `file` (standard error by default).
-
-    Yields elements in `things`.
-    """
-    for index, thing in enumerate(things):
-        if (index + 1) % 10 == 0:
-            print(index + 1, '....', sep='', end='', file=file, flush=True)
-        yield thing
-    print('done.', file=file, flush=True)
-
-
 def run(args):  # pylint: disable=C0116
-    cldf = get_dataset(args)
+    # Since all cldfbench commands are imported when cldfbench starts, the functionality to build
+    # the offline browser is only imported when needed.
+    # pylint: disable=import-outside-toplevel
+    from cldfofflinebrowser import output
+    from cldfofflinebrowser.build import build
+    from cldfofflinebrowser.stats import Stats
 
-    outdir = pathlib.Path(args.outdir)
-    if not outdir.exists():
-        outdir.mkdir()
-
-    for sub in ['tiles', 'static']:
-        sub = outdir / sub
-        if not sub.exists():
-            sub.mkdir()
-
-    for p in pathlib.Path(cldfofflinebrowser.__file__).parent.joinpath('static').iterdir():
-        shutil.copy(p, outdir / 'static' / p.name)
-
-    # reading the cldf data
-    data = Data.from_dataset(cldf, args.include, args.with_audio, args.log)
-
-    # download section
-    tiles_outdir = outdir / 'tiles'
-    _recursive_overwrite(pathlib.Path(__file__).parent.parent / 'tiles', tiles_outdir)
-    if args.tiles:  # pragma: no cover
-        osmtiles.download_tiles(
-            args.tiles,
-            tiles_outdir,
-            [(lang['latitude'], lang['longitude']) for lang in data.languages.values()],
-            args.max_zoom,
-            args.padding,
-            args.log)
-
-    download_list = list(data.iter_missing_audio(cldf, outdir))
-    if download_list:
-        args.log.info('Downloading %s audio files...', len(download_list))
-        for target, url in loggable_progress(download_list):
-            target.parent.mkdir(exist_ok=True, parents=True)
-            media.download(cldf, target, url)
-
-    # create offline browser
-    for pid, forms in data.iter_forms_by_parameter():
-        render_directory(
-            outdir,
-            'parameter',
-            pid,
-            data.parameters[pid],
-            data.parameter_page_data(forms),
-            args.max_zoom,
-            data.template_context)
+    cldf = get_dataset(args)
+    stats = Stats() if args.profile or args.stats_json else None
 
-    for lid, forms in data.iter_forms_by_language():
-        render_directory(
-            outdir,
-            'language',
-            lid,
-            data.languages[lid],
-            data.language_page_data(forms),
-            args.max_zoom,
-            data.template_context)
+    with output.get_sink(pathlib.Path(args.outdir)) as sink:
+        build(cldf, sink, args, stats)
 
-    render_directory(
-        outdir,
-        'index',
-        None,
-        None,
-        {
-            'index': True,
-            'languages': {
-                k: {
-                    'Name': v['name'],
-                    'ID': k,
-                    'latitude': v['latitude'],
-                    'longitude': v['longitude'],
-                }
-                for k, v in data.languages.items()}
-        },
-        args.max_zoom,
-        data.template_context,
-        any(p['has_audio'] for p in data.parameters.values()))
+    if args.profile:
+        stats.log(args.log)
+    if args.stats_json:
+        stats.write(args.stats_json)
@@ -0,0 +1,70 @@
+"""
+Preview the offline browser for a CLDF Wordlist, rendering pages on request.
+"""
+from pycldf.cli_util import get_dataset, add_dataset
+from clldutils.clilib import PathType
+
+
+def register(parser):  # pylint: disable=C0116
+    add_dataset(parser)
+    parser.add_argument(
+        '--host',
+        help="Host name or address to listen on.",
+        default='localhost')
+    parser.add_argument(
+        '--port',
+        help="Port to listen on.",
+        default=8000,
+        type=int)
+    parser.add_argument(
+        '--with-audio',
+        help="Also serve audio files",
+        action='store_true',
+        default=False)
+    parser.add_argument(
+        '--include',
+        help="Whitespace separated list of parameter IDs",
+        type=lambda s: s.split(),
+        default=None)
+    parser.add_argument(
+        '--tiles-dir',
+        help="Directory with map tiles, e.g. the 'tiles' directory of an offline browser created "
+             "before.",
+        type=PathType(type='dir'),
+        default=None)
+    parser.add_argument(
+        '--max-zoom',
+        default=10,
+        help="Maximal zoom level of the maps.",
+        type=int)
+    parser.add_argument(
+        '--chunk-size',
+        default=0,
+        help="Maximal number of table rows to render on a page. 0 means no limit.",
+        type=int)
+    parser.add_argument(
+        '--cache-size',
+        default=256,
+        help="Maximal number of rendered pages to keep in memory.",
+        type=int)
+
+
+def run(args):  # pylint: disable=C0116
+    # pylint: disable=import-outside-toplevel
+    from cldfofflinebrowser.create import Data
+    from cldfofflinebrowser.server import Preview, PreviewServer
+
+    cldf = get_dataset(args)
+    preview = Preview(
+        cldf,
+        Data.from_dataset(cldf, args.include, args.with_audio, args.log),
+        max_zoom=args.max_zoom,
+        chunk_size=args.chunk_size,
+        tiles_dirs=[args.tiles_dir] if args.tiles_dir else [],
+        cache_size=args.cache_size)
+    with PreviewServer(preview, args.host, args.port) as server:
+        args.log.info('Serving the offline browser at http://%s:%s/', *server.server_address[:2])
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:  # pragma: no cover
+            pass
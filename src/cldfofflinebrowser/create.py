@@ -17,10 +17,15 @@ from csvw.datatypes import anyURI
 import pycldf
 
 from . import media
+from .output import Sink
+from .clusters import cluster_pyramid
 
 # Forms grouped by language and parameter.
 GroupedFormsType = tuple[str, dict[str, list[collections.OrderedDict[str, Any]]]]
 
+# The LanguageTable columns used by the browser's UI.
+LANGUAGE_COLUMNS = ('name', 'latitude', 'longitude')
+
 
 @dataclasses.dataclass
 class Data:  # pylint: disable=R0902
@@ -100,10 +105,17 @@ class Data:  # pylint: disable=R0902
         return {
             'parameters': sorted(self.parameters.items(), key=get_name),
             'languages': sorted(self.languages.items(), key=get_name),
+            'languages_by_id': self.languages,
             'title_tooltip': self.title_tooltip,
             'title': self.title,
         }
 
+    def shared_language_data(self) -> dict[str, dict[str, Any]]:
+        """JSON serializable language data, shared by all pages displaying languages."""
+        return {
+            lid: {col: lang[col] for col in LANGUAGE_COLUMNS}
+            for lid, lang in self.languages.items()}
+
     def _iter_forms_by(
             self,
             ref: str,
@@ -138,10 +150,22 @@ class Data:  # pylint: disable=R0902
                 } if form['id'] in self.form2audio else None,
             } for form in forms]
 
-    def parameter_page_data(self, forms):
+    def _clusters(self, lids, max_zoom):
+        return cluster_pyramid(
+            ((lid, (self.languages[lid]['latitude'], self.languages[lid]['longitude']))
+             for lid in lids),
+            max_zoom)
+
+    def index_page_data(self, max_zoom: int):
+        """JSON serializable data for the index page."""
+        return {'index': True, 'clusters': self._clusters(self.languages, max_zoom)}
+
+    def parameter_page_data(self, forms, max_zoom: int):
         """JSON serializable data for a parameter page."""
-        pforms = {lid: self._forms_for_page_data(fs) for lid, fs in forms.items()}
-        return {'languages': {lid: self.languages[lid] for lid in pforms}, 'forms': pforms}
+        return {
+            'forms': {lid: self._forms_for_page_data(fs) for lid, fs in forms.items()},
+            'clusters': self._clusters(forms, max_zoom),
+        }
 
     def language_page_data(self, forms):
         """JSON serializable data for a language page."""
@@ -154,8 +178,8 @@ class Data:  # pylint: disable=R0902
     def iter_missing_audio(
             self,
             cldf: pycldf.Dataset,
-            outdir: pathlib.Path,
-    ) -> Generator[tuple[pathlib.Path, str], None, None]:
+            sink: Sink,
+    ) -> Generator[tuple[pathlib.PurePosixPath, str], None, None]:
         """Yield pairs specifying audio files not yet part of the offline browser."""
         for fid, aid in self.form2audio.items():
             pid = self.forms[fid]['parameterReference']
@@ -163,8 +187,9 @@ class Data:  # pylint: disable=R0902
             suffix = media.PREFERRED_AUDIO.get(audio_file['mediaType']) \
                 or mimetypes.guess_extension(audio_file['mediaType']) \
                 or '.bin'
-            p = audio_file['file-path'] = outdir / f'parameter-{pid}' / f'{fid}{suffix}'
-            if not p.exists():
+            p = audio_file['file-path'] = \
+                pathlib.PurePosixPath(f'parameter-{pid}', f'{fid}{suffix}')
+            if not sink.exists(p):
                 yield p, anyURI.to_string(cldf.get_row_url(self.media_table, audio_file))
 
     def _load_audio(self, cldf, log):
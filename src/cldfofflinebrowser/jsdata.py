@@ -0,0 +1,84 @@
+"""
+Functionality to write data as Javascript files, assigning JSON serialized values to variables.
+
+If `orjson <https://pypi.org/project/orjson/>`_ is installed, it is used to speed up serialization.
+"""
+import json
+import decimal
+from typing import Any, BinaryIO
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+__all__ = ['dump_js', 'write_js']
+
+
+def _default(obj):
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_default)
+
+
+def _iter_orjson(value: Any, depth: int):
+    """
+    Serialize `value` with orjson, but stream the items of dicts and lists in the top `depth` levels
+    rather than building the serialization of the whole value in memory.
+    """
+    if depth and isinstance(value, dict) and value:
+        sep = b'{'
+        for key, item in value.items():
+            # Serialize the key like orjson would, i.e. converting non-string keys.
+            yield sep + orjson.dumps({key: 0}, option=orjson.OPT_NON_STR_KEYS)[1:-2]
+            yield from _iter_orjson(item, depth - 1)
+            sep = b','
+        yield b'}'
+    elif depth and isinstance(value, list) and value:
+        sep = b'['
+        for item in value:
+            yield sep
+            yield from _iter_orjson(item, depth - 1)
+            sep = b','
+        yield b']'
+    else:
+        yield orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _dump_json(value: Any, fp: BinaryIO, use_orjson: bool):
+    if use_orjson:
+        # Page data is keyed by language or parameter at the second level. Streaming the top two
+        # levels bounds memory use by the data of the biggest language or parameter.
+        for chunk in _iter_orjson(value, 2):
+            fp.write(chunk)
+        return
+    # Stream the serialization in chunks, rather than building one big string first.
+    for chunk in _encoder.iterencode(value):
+        fp.write(chunk.encode('utf8'))
+
+
+def dump_js(fp: BinaryIO, variables: dict[str, Any], use_orjson: bool = orjson is not None):
+    """
+    Write Javascript assigning compact JSON serializations of the values to the variables.
+
+    The serialization is written in pieces, so big values never need to be held in memory as one
+    string. With `use_orjson` the pieces are bigger - the items of the top two levels of dicts and
+    lists - trading some memory for speed.
+    """
+    for name, value in variables.items():
+        fp.write(f'{name} = '.encode('utf8'))
+        _dump_json(value, fp, use_orjson)
+        fp.write(b';\n')
+
+
+def write_js(sink, path, variables: dict[str, Any]):
+    """
+    Write a Javascript file to an `output.Sink`, assigning JSON serialized values to variables.
+    """
+    with sink.open(path) as fp:
+        dump_js(fp, variables)
@@ -1,10 +1,7 @@
 """
 Functionality related to media file access.
 """
-import pathlib
-import shutil
 import collections
-from urllib.request import urlretrieve
 from typing import Any, Optional
 
 __all__ = ['PREFERRED_AUDIO', 'download', 'get_best_audio']
@@ -17,13 +14,15 @@ PREFERRED_AUDIO = collections.OrderedDict([
 ])
 
 
-def download(cldf, target, url) -> pathlib.Path:
-    """Retrieve a media file from a CLDF dataset, copying it or downloading."""
-    if not target.exists():
+def download(cldf, sink, target, url):
+    """
+    Retrieve a media file from a CLDF dataset into an `output.Sink`, copying it or downloading.
+    """
+    if not sink.exists(target):
         if cldf.directory.joinpath(url).exists():
-            shutil.copy(cldf.directory / url, target)
+            sink.copy(cldf.directory / url, target)
         else:  # pragma: no cover
-            urlretrieve(url, target)
+            sink.retrieve(url, target)
     return target
 
 
@@ -18,13 +18,16 @@ import time
 import pathlib
 import subprocess
 import dataclasses
-from urllib.request import urlretrieve
+from typing import Optional, Union
 from collections.abc import Iterable, Generator
 
 from tqdm import tqdm
 from clldutils.path import ensure_cmd
 
-__all__ = ['download_tiles']
+from .output import Sink, DirectorySink
+from .pipeline import bounded_map
+
+__all__ = ['plan_tiles', 'fetch_tiles', 'download_tiles']
 
 MAX_ZOOM = 14
 
@@ -54,7 +57,7 @@ class Tile:
             max(0, min(2**self.zoom - 1, self.y)),
             self.zoom)
 
-    def path(self, parent: pathlib.Path) -> pathlib.Path:
+    def path(self, parent: pathlib.PurePath) -> pathlib.PurePath:
         """
         The path for a tile where it will be looked up by the mapping library.
 
@@ -213,34 +216,69 @@ def get_tile_list(minzoom: int, maxzoom: int, bb: BoundingBox, padding: int) ->
     return [tile for bb, zoom in padded_boxes for tile in iter_area_tiles(bb, zoom)]
 
 
+def plan_tiles(
+        sink: Sink,
+        coords: Iterable[tuple[float, float]],
+        max_zoom: int,
+        padding: int,
+        root: pathlib.PurePath = pathlib.PurePosixPath('tiles'),
+) -> tuple[list[tuple[Tile, pathlib.PurePath]], int]:
+    """
+    Compute required tiles.
+
+    Returns the list of pairs (tile, path) for tiles missing below `root` in `sink` and the number
+    of required tiles.
+    """
+    tile_list = get_tile_list(0, max_zoom, get_bounding_box(coords), padding=padding)
+    todo = [(tile, tile.path(root)) for tile in tile_list]
+    return [(tile, p) for tile, p in todo if not sink.exists(p)], len(tile_list)
+
+
+def fetch_tiles(  # pylint: disable=R0913,R0917
+        mbtiles_path: pathlib.Path,
+        sink: Sink,
+        todo: list[tuple[Tile, pathlib.PurePath]],
+        progress=tqdm,
+        workers: int = 1,
+        server_class: Optional[type] = None,
+):
+    """
+    Download tiles from a locally spun-up tileserver of type `server_class` (`TileServer` by
+    default), using up to `workers` concurrent requests.
+    """
+    with (server_class or TileServer)(mbtiles_path) as tileserver:
+        for _ in progress(
+                bounded_map(lambda t: sink.retrieve(tileserver.url(t[0]), t[1]), todo, workers),
+                total=len(todo)):
+            pass
+
+
 def download_tiles(  # pylint: disable=R0913,R0917
         mbtiles_path: pathlib.Path,
-        out_dir: pathlib.Path,
+        out_dir: Union[pathlib.Path, Sink],
         coords: Iterable[tuple[float, float]],
         max_zoom: int,
         padding: int,
         log=None,
+        progress=tqdm,
+        workers: int = 1,
+        server_class: Optional[type] = None,
 ) -> int:
     """
     Compute required tiles and download missing ones from a locally spun-up tileserver.
-    """
-    bb = get_bounding_box(coords)
-    tile_list = get_tile_list(
-        0, max_zoom,
-        bb,
-        padding=padding)
-    if not tile_list:
-        return 0  # pragma: no cover
 
-    todo = [(tile, tile.path(out_dir)) for tile in tile_list]
-    todo = [(tile, p) for tile, p in todo if not p.exists()]
+    Tiles are written to the directory `out_dir` or - if `out_dir` is an `output.Sink` - to
+    `tiles/` in the sink.
+    """
+    if isinstance(out_dir, Sink):
+        sink, root = out_dir, pathlib.PurePosixPath('tiles')
+    else:
+        sink, root = DirectorySink(out_dir), pathlib.PurePosixPath('.')
+    todo, total = plan_tiles(sink, coords, max_zoom, padding, root=root)
 
     if log:
-        log.info('Downloading %s out of %s required tiles.', len(todo), len(tile_list))
-
-    with TileServer(mbtiles_path) as tileserver:
-        for tile, tile_path in tqdm(todo):
-            tile_path.parent.mkdir(exist_ok=True, parents=True)
-            urlretrieve(tileserver.url(tile), tile_path)
+        log.info('Downloading %s out of %s required tiles.', len(todo), total)
 
+    if todo:
+        fetch_tiles(mbtiles_path, sink, todo, progress, workers, server_class)
     return len(todo)
@@ -0,0 +1,291 @@
+"""
+Output sinks, i.e. the places the files of the offline browser are written to.
+
+All files are addressed by POSIX-style paths relative to the root of the offline browser.
+"""
+import io
+import os
+import shutil
+import pathlib
+import struct
+import zipfile
+import tempfile
+import threading
+import contextlib
+from typing import BinaryIO, Union
+from collections.abc import Generator
+from urllib.request import urlopen
+
+__all__ = ['Sink', 'DirectorySink', 'ZipSink', 'MemorySink', 'CountingSink', 'get_sink']
+
+PathType = Union[str, pathlib.PurePath]
+
+# Suffixes of files which are already compressed and thus are stored in ZIP archives as is.
+STORED_SUFFIXES = {'.png', '.jpg', '.jpeg', '.gif', '.mp3', '.ogg', '.zip'}
+
+# ZIP entries get a fixed timestamp to make archives reproducible.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Data written to ZIP entries is buffered, to compress it in bigger pieces.
+ZIP_BUFFER_SIZE = 1024 * 1024
+
+
+class Sink:
+    """
+    Base class for output sinks.
+
+    Subclasses must implement `exists` and `open`.
+    """
+    # Whether the sink can be passed to and written to from other processes.
+    shareable = False
+
+    def exists(self, path: PathType) -> bool:
+        """Check whether a file exists in the sink."""
+        raise NotImplementedError()  # pragma: no cover
+
+    def open(self, path: PathType) -> BinaryIO:
+        """Open a file in the sink for writing binary data."""
+        raise NotImplementedError()  # pragma: no cover
+
+    def write_bytes(self, path: PathType, data: bytes):  # pylint: disable=C0116
+        with self.open(path) as fp:
+            fp.write(data)
+
+    def write_text(self, path: PathType, text: str):  # pylint: disable=C0116
+        self.write_bytes(path, text.encode('utf8'))
+
+    def copy(self, src: pathlib.Path, path: PathType):
+        """Copy a local file into the sink."""
+        with src.open('rb') as fin, self.open(path) as fout:
+            shutil.copyfileobj(fin, fout)
+
+    def link(self, src: pathlib.Path, path: PathType):
+        """
+        Link a local file into the sink, i.e. add it without copying, if the sink supports it.
+        """
+        self.copy(src, path)
+
+    def copy_tree(self, src: pathlib.Path, path: PathType):
+        """Copy a local directory into the sink, overwriting existing files."""
+        for p in sorted(src.glob('**/*')):
+            if p.is_file():
+                self.copy(p, pathlib.PurePosixPath(path) / p.relative_to(src).as_posix())
+
+    def retrieve(self, url: str, path: PathType):
+        """Download a file into the sink."""
+        with urlopen(url) as res, self.open(path) as fp:
+            shutil.copyfileobj(res, fp)
+
+    def close(self):  # pylint: disable=C0116
+        pass
+
+    def discard(self):
+        """Close the sink after a failure, discarding partial output if possible."""
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class DirectorySink(Sink):
+    """
+    Write files to a directory.
+
+    Existing files are replaced rather than overwritten, so files linked into the directory are not
+    modified.
+    """
+    shareable = True
+
+    def __init__(self, directory: pathlib.Path):
+        self.directory = pathlib.Path(directory)
+        if not self.directory.exists():
+            self.directory.mkdir(parents=True)
+
+    def path(self, path: PathType) -> pathlib.Path:  # pylint: disable=C0116
+        return self.directory / path
+
+    def exists(self, path: PathType) -> bool:
+        return self.path(path).exists()
+
+    def _replace(self, path: PathType) -> pathlib.Path:
+        p = self.path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.unlink(missing_ok=True)
+        return p
+
+    def open(self, path: PathType) -> BinaryIO:
+        return self._replace(path).open('wb')
+
+    def copy(self, src: pathlib.Path, path: PathType):
+        shutil.copyfile(src, self._replace(path))
+
+    def link(self, src: pathlib.Path, path: PathType):
+        """Create a hard link to a local file, or copy it if that is not possible."""
+        p = self._replace(path)
+        try:
+            os.link(src, p)
+        except OSError:  # pragma: no cover
+            shutil.copyfile(src, p)
+
+
+class ZipSink(Sink):
+    """
+    Write files to a ZIP archive.
+
+    Each thread writing to the sink compresses its entries into a temporary archive of its own, so
+    threads don't wait for each other. When the sink is closed, the compressed entries are copied -
+    sorted by path - into the archive. Thus, archives are reproducible, no matter in which order
+    concurrent build phases add files. Entries have fixed timestamps and permissions. Already
+    compressed files are stored, everything else is deflated.
+    """
+    def __init__(self, path: pathlib.Path):
+        self.path = pathlib.Path(path)
+        self.names = set()
+        # Temporary archives - keyed by thread identifier - and the files they are written to.
+        self.parts, self.files = {}, []
+        self.lock = threading.Lock()
+
+    def exists(self, path: PathType) -> bool:
+        return str(pathlib.PurePosixPath(path)) in self.names
+
+    def _part(self) -> zipfile.ZipFile:
+        with self.lock:
+            part = self.parts.get(threading.get_ident())
+            if part is None:
+                self.files.append(tempfile.TemporaryFile(dir=self.path.parent))
+                part = zipfile.ZipFile(self.files[-1], 'w')
+                self.parts[threading.get_ident()] = part
+            return part
+
+    @contextlib.contextmanager
+    def open(self, path: PathType) -> Generator[BinaryIO, None, None]:
+        path = pathlib.PurePosixPath(path)
+        info = zipfile.ZipInfo(str(path), date_time=ZIP_DATE_TIME)
+        info.compress_type = zipfile.ZIP_STORED \
+            if path.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        with self.lock:
+            if info.filename in self.names:
+                raise ValueError(f'Duplicate entry {info.filename}')
+            self.names.add(info.filename)
+        with io.BufferedWriter(self._part().open(info, 'w'), ZIP_BUFFER_SIZE) as fp:
+            yield fp
+
+    def close(self):
+        try:
+            entries = []
+            for part in self.parts.values():
+                fp = part.fp
+                part.close()
+                entries.extend((info, fp) for info in part.infolist())
+            with zipfile.ZipFile(self.path, 'w') as zf:
+                for info, fp in sorted(entries, key=lambda entry: entry[0].filename):
+                    # Copy the local file header and the compressed data of the entry as is.
+                    fp.seek(info.header_offset)
+                    header = fp.read(30)
+                    size = sum(struct.unpack('<HH', header[26:30])) + info.compress_size
+                    info.header_offset = zf.fp.tell()
+                    zf.fp.write(header)
+                    _copy(fp, zf.fp, size)
+                    # Register the entry, to list it in the central directory written on closing.
+                    zf.filelist.append(info)
+                    zf.NameToInfo[info.filename] = info
+                zf.start_dir = zf.fp.tell()
+        finally:
+            self.discard()
+
+    def discard(self):
+        """Remove the temporary archives without writing the archive."""
+        for part in self.parts.values():
+            part.close()
+        for fp in self.files:
+            fp.close()
+        self.parts, self.files = {}, []
+
+
+def _copy(fin: BinaryIO, fout: BinaryIO, size: int):
+    """Copy `size` bytes from `fin` to `fout`."""
+    while size > 0:
+        chunk = fin.read(min(size, ZIP_BUFFER_SIZE))
+        if not chunk:  # pragma: no cover
+            raise ValueError('Unexpected end of file')
+        fout.write(chunk)
+        size -= len(chunk)
+
+
+class MemorySink(Sink):
+    """Collect files in memory."""
+    def __init__(self):
+        self.files = {}
+
+    def exists(self, path: PathType) -> bool:
+        return str(pathlib.PurePosixPath(path)) in self.files
+
+    @contextlib.contextmanager
+    def open(self, path: PathType) -> Generator[BinaryIO, None, None]:
+        fp = io.BytesIO()
+        yield fp
+        self.files[str(pathlib.PurePosixPath(path))] = fp.getvalue()
+
+
+class _CountingWriter:
+    def __init__(self, fp: BinaryIO):
+        self.fp = fp
+        self.bytes = 0
+
+    def write(self, data: bytes) -> int:  # pylint: disable=C0116
+        self.bytes += len(data)
+        return self.fp.write(data)
+
+
+class CountingSink(Sink):
+    """
+    Wrap a sink, counting the files and bytes written to it.
+
+    Since counts cannot be collected from other processes, a `CountingSink` is not shareable.
+    """
+    def __init__(self, sink: Sink):
+        self.sink = sink
+        self.files = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def _add(self, size: int):
+        with self.lock:
+            self.files += 1
+            self.bytes += size
+
+    def exists(self, path: PathType) -> bool:
+        return self.sink.exists(path)
+
+    @contextlib.contextmanager
+    def open(self, path: PathType) -> Generator[BinaryIO, None, None]:
+        with self.sink.open(path) as fp:
+            writer = _CountingWriter(fp)
+            yield writer
+        self._add(writer.bytes)
+
+    def copy(self, src: pathlib.Path, path: PathType):
+        self.sink.copy(src, path)
+        self._add(src.stat().st_size)
+
+    def link(self, src: pathlib.Path, path: PathType):
+        self.sink.link(src, path)
+        self._add(src.stat().st_size)
+
+
+def get_sink(path: pathlib.Path) -> Sink:
+    """
+    Get a suitable sink for a path: A ZIP archive for paths with suffix `.zip`, a directory
+    otherwise.
+    """
+    path = pathlib.Path(path)
+    if path.suffix.lower() == '.zip':
+        return ZipSink(path)
+    return DirectorySink(path)
@@ -0,0 +1,147 @@
+"""
+Functionality to run independent phases of a build concurrently.
+"""
+import sys
+import itertools
+import threading
+import collections
+from concurrent.futures import Executor, ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from collections.abc import Callable, Iterable
+from typing import Any, Optional
+
+from tqdm import tqdm
+
+__all__ = [
+    'Cancelled', 'check_cancelled', 'loggable_progress', 'run_phases', 'bounded_map', 'ordered_map',
+    'batched']
+
+# A function wrapping an iterable to report progress, e.g. `tqdm`.
+ProgressType = Callable[..., Iterable]
+
+# The cancellation event of the phase running in a thread.
+_phase = threading.local()
+
+
+class Cancelled(Exception):
+    """Raised in a phase to stop it, because another phase failed."""
+
+
+def check_cancelled():
+    """Raise `Cancelled` if the phase running in the current thread has been cancelled."""
+    cancelled = getattr(_phase, 'cancelled', None)
+    if cancelled is not None and cancelled.is_set():
+        raise Cancelled()
+
+
+def _cancellable(items: Iterable) -> Iterable:
+    for item in items:
+        check_cancelled()
+        yield item
+
+
+def loggable_progress(things, file=None, desc: Optional[str] = None):
+    """'Progressbar' that doesn't clog up logs with escape codes.
+
+    Loops over `things` and prints a status update every 10 elements.
+    Writes status updates to `file` (standard error by default).
+
+    Yields elements in `things`.
+    """
+    file = file or sys.stderr
+    prefix = f'{desc}: ' if desc else ''
+    for index, thing in enumerate(things):
+        if (index + 1) % 10 == 0:
+            print(prefix, index + 1, '....', sep='', end='', file=file, flush=True)
+        yield thing
+    print(prefix, 'done.', sep='', file=file, flush=True)
+
+
+def _progress(desc: str, position: int) -> ProgressType:
+    def progress(iterable, total=None):
+        if total is None and hasattr(iterable, '__len__'):
+            total = len(iterable)
+        iterable = _cancellable(iterable)
+        if sys.stderr.isatty():  # pragma: no cover
+            return tqdm(iterable, total=total, desc=desc, position=position, leave=True)
+        return loggable_progress(iterable, desc=desc)
+    return progress
+
+
+def ordered_map(executor: Executor, func: Callable, items: Iterable, window: int) -> Iterable:
+    """
+    Apply `func` to `items` in `executor`, yielding results in the order of `items`.
+
+    Unlike `Executor.map`, `items` are consumed lazily: At most `window` items are submitted ahead
+    of the result yielded, so pending items and results don't pile up in memory. If the iteration
+    is stopped - e.g. because the phase has been cancelled - pending items are cancelled.
+    """
+    pending = collections.deque()
+    try:
+        for item in _cancellable(items):
+            if len(pending) >= window:
+                yield pending.popleft().result()
+            pending.append(executor.submit(func, item))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def batched(items: Iterable, size: int) -> Iterable[list]:
+    """Split `items` into lists of at most `size` items."""
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bounded_map(func: Callable, items: Iterable, workers: int = 1) -> Iterable:
+    """
+    Apply `func` to `items`, using at most `workers` threads.
+
+    Results are yielded in the order of `items`.
+    """
+    if workers <= 1:
+        for item in _cancellable(items):
+            yield func(item)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from ordered_map(executor, func, items, 2 * workers)
+
+
+def _run_phase(func: Callable[[ProgressType], Any], progress: ProgressType, cancelled):
+    _phase.cancelled = cancelled
+    try:
+        return func(progress)
+    finally:
+        _phase.cancelled = None
+
+
+def run_phases(phases: dict[str, Callable[[ProgressType], Any]]) -> dict[str, Any]:
+    """
+    Run phases concurrently, each in its own thread.
+
+    Each phase is called with a function to wrap iterables with for progress reporting, where
+    progress of all phases is displayed together.
+
+    Returns the results of the phases, keyed by phase name. If a phase fails, the other phases are
+    cancelled - i.e. `Cancelled` is raised in them when they iterate over the next item, see
+    `check_cancelled` - and the exception is raised as soon as they stopped.
+    """
+    cancelled = threading.Event()
+    with ThreadPoolExecutor(max_workers=max(len(phases), 1)) as executor:
+        futures = {
+            name: executor.submit(_run_phase, func, _progress(name, i), cancelled)
+            for i, (name, func) in enumerate(phases.items())}
+        wait(futures.values(), return_when=FIRST_EXCEPTION)
+        if any(future.done() and future.exception() for future in futures.values()):
+            cancelled.set()
+    errors = [
+        future.exception() for future in futures.values()
+        if future.exception() and not isinstance(future.exception(), Cancelled)]
+    if errors:
+        raise errors[0]
+    return {name: future.result() for name, future in futures.items()}
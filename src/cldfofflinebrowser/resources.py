@@ -0,0 +1,170 @@
+"""
+Resources added to the offline browser: static files, map tiles and audio files.
+
+`Resources` writes or downloads these files into the sink of each build. `SharedResources` serve
+many builds - e.g. of a batch of datasets - from one set of static files, one tile server session
+and caches for map tiles and audio files, linking files into the sinks.
+"""
+import hashlib
+import pathlib
+import threading
+import contextlib
+import collections
+from typing import Callable, Optional
+
+import cldfofflinebrowser
+from . import assets
+from . import media
+from . import osmtiles
+from .output import Sink, DirectorySink
+from .pipeline import bounded_map
+
+__all__ = ['Resources', 'SharedResources']
+
+TILES_DIR = pathlib.Path(cldfofflinebrowser.__file__).parent / 'tiles'
+
+
+class Resources:
+    """Add resources to an offline browser by copying or downloading them."""
+    def static_files(self) -> list[str]:
+        """The paths of the static files, see `assets.static_files`."""
+        return sorted(assets.static_files())
+
+    def add_static(self, sink: Sink, path: str):
+        """
+        Add a static file. Bundles are only written if missing, since their names change with their
+        content.
+        """
+        if not (_is_bundle(path) and sink.exists(path)):
+            sink.write_bytes(path, assets.static_files()[path])
+
+    def remove_stale_static(self, sink: Sink):
+        """
+        Remove files from the `static` directory of a `DirectorySink` which are not static files of
+        this version - e.g. outdated bundles or files bundled now - from an earlier build.
+        """
+        if isinstance(sink, DirectorySink) and sink.path('static').is_dir():
+            for p in sink.path('static').iterdir():
+                if p.is_file() and f'static/{p.name}' not in assets.static_files():
+                    p.unlink()
+
+    def add_default_tiles(self, sink: Sink):
+        """Add the tiles for the lowest zoom levels, distributed with the package."""
+        sink.copy_tree(TILES_DIR, 'tiles')
+
+    def add_tiles(  # pylint: disable=R0913,R0917
+            self,
+            mbtiles_path: pathlib.Path,
+            sink: Sink,
+            todo: list[tuple[osmtiles.Tile, pathlib.PurePath]],
+            progress: Callable,
+            workers: int = 1,
+    ):
+        """Add the tiles listed in `todo`, see `osmtiles.plan_tiles`."""
+        osmtiles.fetch_tiles(mbtiles_path, sink, todo, progress=progress, workers=workers)
+
+    def add_audio(self, cldf, sink: Sink, target: pathlib.PurePath, url: str):
+        """Add an audio file, see `create.Data.iter_missing_audio`."""
+        media.download(cldf, sink, target, url)
+
+
+class SharedResources(Resources):
+    """
+    Add resources to offline browsers by linking them from a directory, holding the static files
+    and caching map tiles and audio files.
+
+    A tile server of type `server_class` (`osmtiles.TileServer` by default) is started when tiles
+    are first requested, and runs until the context is left.
+    """
+    def __init__(self, directory: pathlib.Path, server_class: Optional[type] = None):
+        self.cache = DirectorySink(directory)
+        self.server_class = server_class or osmtiles.TileServer
+        self.tileserver = None
+        self.lock = threading.Lock()
+        self.locks = collections.defaultdict(threading.Lock)
+        self.exit_stack = contextlib.ExitStack()
+        self.remove_stale_static(self.cache)
+        for path, content in assets.static_files().items():
+            if not self.cache.exists(path) or self.cache.path(path).read_bytes() != content:
+                self.cache.write_bytes(path, content)
+        for p, path in _files(TILES_DIR, 'tiles'):
+            if not self.cache.exists(path) or self.cache.path(path).read_bytes() != p.read_bytes():
+                self.cache.copy(p, path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.exit_stack.close()
+
+    def _cached(self, path: str, retrieve: Callable[[str], None]) -> pathlib.Path:
+        """Make sure a file is in the cache, retrieving it if necessary."""
+        with self.lock:
+            lock = self.locks[path]
+        with lock:
+            if not self.cache.exists(path):
+                # Retrieve to a temporary file first, to not cache partial downloads.
+                retrieve(f'{path}.part')
+                self.cache.path(f'{path}.part').replace(self.cache.path(path))
+        return self.cache.path(path)
+
+    def _tileserver(self, mbtiles_path: pathlib.Path) -> osmtiles.TileServer:
+        with self.lock:
+            if self.tileserver is None:
+                self.tileserver = self.exit_stack.enter_context(self.server_class(mbtiles_path))
+        return self.tileserver
+
+    def add_static(self, sink: Sink, path: str):
+        if not (_is_bundle(path) and sink.exists(path)):
+            sink.link(self.cache.path(path), path)
+
+    def add_default_tiles(self, sink: Sink):
+        for _, path in _files(TILES_DIR, 'tiles'):
+            sink.link(self.cache.path(path), path)
+
+    def add_tiles(  # pylint: disable=R0913,R0917
+            self,
+            mbtiles_path: pathlib.Path,
+            sink: Sink,
+            todo: list[tuple[osmtiles.Tile, pathlib.PurePath]],
+            progress: Callable,
+            workers: int = 1,
+    ):
+        # Tiles are cached per mbtiles file, since the cache directory outlives a batch.
+        root = pathlib.PurePosixPath(f'tiles-{_file_id(mbtiles_path)}')
+
+        def add(item):
+            tile, p = item
+            src = self._cached(
+                str(tile.path(root)),
+                lambda path: self.cache.retrieve(self._tileserver(mbtiles_path).url(tile), path))
+            sink.link(src, p)
+
+        for _ in progress(bounded_map(add, todo, workers), total=len(todo)):
+            pass
+
+    def add_audio(self, cldf, sink: Sink, target: pathlib.PurePath, url: str):
+        if cldf.directory.joinpath(url).exists():
+            src = cldf.directory / url
+        else:
+            src = self._cached(
+                f"audio/{hashlib.sha1(url.encode('utf8')).hexdigest()}{target.suffix}",
+                lambda path: self.cache.retrieve(url, path))
+        sink.link(src, target)
+
+
+def _file_id(p: pathlib.Path) -> str:
+    """Identify a file by its resolved path, size and modification time."""
+    p = pathlib.Path(p).resolve()
+    stat = p.stat()
+    return hashlib.sha1(f'{p}:{stat.st_size}:{stat.st_mtime_ns}'.encode('utf8')).hexdigest()[:12]
+
+
+def _is_bundle(path: str) -> bool:
+    return path.startswith('static/bundle.')
+
+
+def _files(directory: pathlib.Path, prefix: str) -> list[tuple[pathlib.Path, str]]:
+    return [
+        (p, f'{prefix}/{p.relative_to(directory).as_posix()}')
+        for p in sorted(directory.glob('**/*')) if p.is_file()]
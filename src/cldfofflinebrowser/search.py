@@ -0,0 +1,86 @@
+"""
+Functionality to create a static full-text search index for the offline browser.
+
+The index maps normalized words in form strings, language names and parameter names to documents,
+i.e. links to pages. To keep the files which must be loaded for a query small, the index is split
+into shards, keyed by the first `PREFIX_LENGTH` characters of the words. Shorter words - e.g. the
+one-character words common in CJK wordlists - are keyed by the whole word, so they can only be
+found by exact match.
+
+Notes: Normalization and tokenization must match `OFFLINE.Search` in `offline.js`.
+"""
+import unicodedata
+import collections
+from collections.abc import Generator, Iterable
+
+from .jsdata import write_js
+
+__all__ = [
+    'PREFIX_LENGTH', 'normalize', 'tokenize', 'shard_key', 'iter_documents', 'search_index',
+    'write_index']
+
+PREFIX_LENGTH = 2
+
+# A document is specified as [URL relative to the index page, label, context].
+DocumentType = tuple[str, str, str]
+
+
+def normalize(s: str) -> str:
+    """Lowercase and remove diacritics."""
+    return ''.join(
+        c for c in unicodedata.normalize('NFKD', s)
+        if not unicodedata.category(c).startswith('M')).lower()
+
+
+def tokenize(s: str) -> list[str]:
+    """Split a normalized string into words, i.e. sequences of letters and numbers."""
+    return ''.join(c if unicodedata.category(c)[0] in 'LN' else ' ' for c in s).split()
+
+
+def shard_key(word: str) -> str:
+    """The key of the shard containing a word, usable as file name."""
+    return '-'.join(f'{ord(c):x}' for c in word[:PREFIX_LENGTH])
+
+
+def iter_documents(data) -> Generator[tuple[str, DocumentType], None, None]:
+    """Yield pairs (text, document) for the searchable data of a `create.Data` object."""
+    for lid, lang in data.languages.items():
+        yield lang['name'], (f'language-{lid}/index.html', lang['name'], 'Language')
+    for pid, param in data.parameters.items():
+        yield param['name'], (f'parameter-{pid}/index.html', param['name'], 'Parameter')
+    for form in data.forms.values():
+        yield form['form'], (
+            f"parameter-{form['parameterReference']}/index.html",
+            form['form'],
+            f"{data.languages[form['languageReference']]['name']}: "
+            f"{data.parameters[form['parameterReference']]['name']}")
+
+
+def search_index(docs: Iterable[tuple[str, DocumentType]]) -> dict[str, dict]:
+    """
+    Compute the shards of the search index.
+
+    Each shard lists the documents containing words with the shard's prefix and maps these words to
+    indices in the list of documents.
+    """
+    shards = collections.defaultdict(lambda: {'docs': {}, 'words': collections.defaultdict(set)})
+    for text, doc in docs:
+        for word in set(tokenize(normalize(text or ''))):
+            shard = shards[shard_key(word)]
+            index = shard['docs'].setdefault(doc, len(shard['docs']))
+            shard['words'][word].add(index)
+    return {
+        key: {
+            'docs': list(shard['docs']),
+            'words': {word: sorted(shard['words'][word]) for word in sorted(shard['words'])}}
+        for key, shard in sorted(shards.items())}
+
+
+def write_index(sink, docs: Iterable[tuple[str, DocumentType]]) -> int:
+    """
+    Write the shards of the search index to files `search/<key>.js` in an `output.Sink`.
+    """
+    shards = search_index(docs)
+    for key, shard in shards.items():
+        write_js(sink, f'search/{key}.js', {f'OFFLINE.search["{key}"]': shard})
+    return len(shards)
@@ -0,0 +1,178 @@
+"""
+A preview server for the offline browser, rendering pages on request rather than writing all pages
+of a dataset to disk.
+
+Rendered page directories are kept in an LRU cache. Static files are bundled in memory, map tiles
+are served from the package and tile directories, audio files from the dataset's directory (or by
+redirect).
+"""
+import pathlib
+import functools
+import mimetypes
+import http.server
+import urllib.parse
+from typing import Optional, Union
+from collections.abc import Iterable
+
+import pycldf
+
+import cldfofflinebrowser
+from cldfofflinebrowser import assets
+from cldfofflinebrowser import search
+from cldfofflinebrowser.create import Data
+from cldfofflinebrowser.output import MemorySink
+from cldfofflinebrowser.template import render_directory, render_navigation, render_shared_data
+
+__all__ = ['Preview', 'PreviewServer']
+
+PACKAGE_DIR = pathlib.Path(cldfofflinebrowser.__file__).parent
+
+
+class Preview:  # pylint: disable=R0902
+    """
+    Provide the files of the offline browser for a dataset, rendering pages when first requested.
+    """
+    def __init__(  # pylint: disable=R0913,R0917
+            self,
+            cldf: pycldf.Dataset,
+            data: Data,
+            max_zoom: int = 10,
+            chunk_size: int = 0,
+            tiles_dirs: Iterable[pathlib.Path] = (),
+            cache_size: int = 256,
+    ):
+        self.cldf = cldf
+        self.data = data
+        self.max_zoom = max_zoom
+        self.chunk_size = chunk_size
+        self.tiles_dirs = list(tiles_dirs) + [PACKAGE_DIR / 'tiles']
+        # Audio file paths must be determined before rendering, because pages link to them.
+        self.audio = {str(p): url for p, url in data.iter_missing_audio(cldf, MemorySink())}
+        self.directory = functools.lru_cache(maxsize=cache_size)(self._render_directory)
+
+    @functools.cached_property
+    def forms_by_parameter(self):  # pylint: disable=C0116
+        return dict(self.data.iter_forms_by_parameter())
+
+    @functools.cached_property
+    def forms_by_language(self):  # pylint: disable=C0116
+        return dict(self.data.iter_forms_by_language())
+
+    @functools.cached_property
+    def shared_files(self) -> dict[str, bytes]:
+        """The data files shared by all pages."""
+        sink = MemorySink()
+        render_navigation(sink, self.data.template_context)
+        render_shared_data(sink, 'languages', self.data.shared_language_data())
+        search.write_index(sink, search.iter_documents(self.data))
+        return sink.files
+
+    def _render_directory(self, name: str) -> Optional[dict[str, bytes]]:
+        """Render the files of a page directory, i.e. `index.html` and data files."""
+        sink = MemorySink()
+        type_, _, id_ = name.partition('-')
+        if name == '.':
+            render_directory(
+                sink,
+                'index',
+                None,
+                None,
+                self.data.index_page_data(self.max_zoom),
+                self.max_zoom,
+                self.data.template_context,
+                any(p['has_audio'] for p in self.data.parameters.values()))
+        elif type_ == 'parameter' and id_ in self.forms_by_parameter:
+            render_directory(
+                sink,
+                type_,
+                id_,
+                self.data.parameters[id_],
+                self.data.parameter_page_data(self.forms_by_parameter[id_], self.max_zoom),
+                self.max_zoom,
+                self.data.template_context,
+                chunk_size=self.chunk_size)
+        elif type_ == 'language' and id_ in self.forms_by_language:
+            render_directory(
+                sink,
+                type_,
+                id_,
+                self.data.languages[id_],
+                self.data.language_page_data(self.forms_by_language[id_]),
+                self.max_zoom,
+                self.data.template_context,
+                chunk_size=self.chunk_size)
+        else:
+            return None
+        return sink.files
+
+    def get(self, path: str) -> Optional[Union[bytes, str]]:
+        """
+        Get the content of the file at `path` - relative to the root of the offline browser.
+
+        Returns `None` if there is no such file, or a URL for audio files which must be downloaded.
+        """
+        parts = pathlib.PurePosixPath(path).parts
+        if not parts or '..' in parts:
+            return None
+        if parts[0] == 'static':
+            return assets.static_files().get(path)
+        if parts[0] == 'tiles':
+            for d in self.tiles_dirs:
+                content = _read(d.joinpath(*parts[1:]))
+                if content is not None:
+                    return content
+            return None
+        if path in self.shared_files:
+            return self.shared_files[path]
+        if path in self.audio:
+            url = self.audio[path]
+            return _read(self.cldf.directory / url) or url
+        files = self.directory('.' if len(parts) == 1 else parts[0])
+        return (files or {}).get(path)
+
+
+def _read(p: pathlib.Path) -> Optional[bytes]:
+    return p.read_bytes() if p.is_file() else None
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=C0103,C0116
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path).lstrip('/')
+        if path == '' or path.endswith('/'):
+            path += 'index.html'
+        elif '.' not in path.split('/')[-1]:
+            # Pages link to files relative to their directory.
+            self._redirect(f'/{path}/')
+            return
+
+        content = self.server.preview.get(path)
+        if content is None:
+            self.send_error(404)
+        elif isinstance(content, str):  # pragma: no cover
+            self._redirect(content)
+        else:
+            mtype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            if mtype.startswith('text/'):
+                mtype += '; charset=utf-8'
+            self.send_response(200)
+            self.send_header('Content-Type', mtype)
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+    def _redirect(self, location):
+        self.send_response(302)
+        self.send_header('Location', location)
+        self.end_headers()
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        pass
+
+
+class PreviewServer(http.server.ThreadingHTTPServer):
+    """An HTTP server serving the files of a `Preview`."""
+    daemon_threads = True
+
+    def __init__(self, preview: Preview, host: str = 'localhost', port: int = 8000):
+        self.preview = preview
+        super().__init__((host, port), _Handler)
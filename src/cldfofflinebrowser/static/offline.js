@@ -1,5 +1,135 @@
 OFFLINE = {};
 
+// Chunks of page data, filled by the data-<i>.js files.
+OFFLINE.chunks = {};
+
+// Shards of the search index, filled by the search/<key>.js files.
+OFFLINE.search = {};
+
+OFFLINE.Scripts = (function () {
+    var callbacks = {}, loaded = {};
+
+    return {
+        load: function (src, callback) {
+            // Data files are loaded via script elements, because XHR does not work with file:// URLs.
+            var script;
+
+            if (loaded[src]) {
+                callback();
+                return;
+            }
+            if (callbacks[src]) {
+                callbacks[src].push(callback);
+                return;
+            }
+            callbacks[src] = [callback];
+            script = document.createElement('script');
+            script.src = src;
+            script.onload = script.onerror = function () {
+                var cbs = callbacks[src];
+                delete callbacks[src];
+                loaded[src] = true;
+                for (var j = 0; j < cbs.length; j++) {
+                    cbs[j]();
+                }
+            };
+            document.head.appendChild(script);
+        }
+    }
+})();
+
+OFFLINE.Chunks = (function () {
+    return {
+        load: function (i, callback) {
+            OFFLINE.Scripts.load('data-' + i + '.js', function () {
+                callback(OFFLINE.chunks[i]);
+            });
+        },
+        loadAll: function (callback, done) {
+            var _next = function (i) {
+                if (i === data['chunks'].length) {
+                    done();
+                    return;
+                }
+                OFFLINE.Chunks.load(i, function (chunk) {
+                    callback(chunk);
+                    _next(i + 1);
+                });
+            };
+            _next(0);
+        }
+    }
+})();
+
+OFFLINE.Table = (function () {
+    var table, current = 0;
+
+    var _cell = function (content) {
+        return $('<td></td>').append(content);
+    }
+
+    var _audio = function (spec, id) {
+        var audio = $('<audio class="table-audio" controls="controls"></audio>');
+        if (id) {
+            audio.attr('id', id);
+        }
+        return audio.append($('<source>').attr('src', spec.name).attr('type', spec.mediaType));
+    }
+
+    var _row = function (chunk, key, form) {
+        var row = $('<tr></tr>'), link;
+
+        if (table.data('type') === 'parameter') {
+            link = $('<a></a>').attr('href', '../language-' + key + '/index.html').text(languages[key]['name']);
+        } else {
+            link = $('<a></a>').attr('href', '../parameter-' + key + '/index.html').text(chunk['parameters'][key]['name']);
+        }
+        row.append(_cell(link), _cell($('<span></span>').text(form['form'])));
+        if (table.data('has-audio')) {
+            row.append(_cell(form['audio'] ? _audio(form['audio'], table.data('type') === 'parameter' ? 'audio-' + key : null) : ''));
+        }
+        return row;
+    }
+
+    var _show = function (i) {
+        var offset = 0;
+
+        current = i;
+        for (var j = 0; j < i; j++) {
+            offset += data['chunks'][j];
+        }
+        $('.chunk-label').text('Rows ' + (offset + 1) + '-' + (offset + data['chunks'][i]) + ' of ' + data['chunks'].reduce(function (a, b) { return a + b; }, 0));
+        $('.chunk-prev').parent().toggleClass('disabled', i === 0);
+        $('.chunk-next').parent().toggleClass('disabled', i === data['chunks'].length - 1);
+        OFFLINE.Chunks.load(i, function (chunk) {
+            var rows = [];
+
+            if (i !== current) return;
+            for (var key in chunk['forms']) {
+                for (var f = 0; f < chunk['forms'][key].length; f++) {
+                    rows.push(_row(chunk, key, chunk['forms'][key][f]));
+                }
+            }
+            table.find('tbody').empty().append(rows);
+        });
+    }
+
+    return {
+        init: function () {
+            table = $('#chunked-table');
+            $('.chunk-prev').on('click', function (e) {
+                e.preventDefault();
+                if (current > 0) _show(current - 1);
+            });
+            $('.chunk-next').on('click', function (e) {
+                e.preventDefault();
+                if (current < data['chunks'].length - 1) _show(current + 1);
+            });
+            _show(0);
+        }
+    }
+})();
+
 OFFLINE.AudioPlayer = (function () {
     var paused = true,
         playlist_index = -1,
@@ -11,10 +141,16 @@ OFFLINE.AudioPlayer = (function () {
     var stop_btn_img = '<img class="btn-ctrl-img" title="Stop audio" src="data:image/svg+xml;base64,PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHdpZHRoPSIxOCIgaGVpZ2h0PSIxOCIgdmlld0JveD0iMCAwIDggOCI+PHBhdGggZD0iTTAgMHY2aDZ2LTZoLTZ6IiB0cmFuc2Zvcm09InRyYW5zbGF0ZSgxIDEpIi8+PC9zdmc+" />';
     var pause_btn_img = '<img class="btn-ctrl-img" title="Pause audio" src="data:image/svg+xml;base64,PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHdpZHRoPSIxOCIgaGVpZ2h0PSIxOCIgdmlld0JveD0iMCAwIDggOCI+PHBhdGggZD0iTTAgMHY2aDJ2LTZoLTJ6bTQgMHY2aDJ2LTZoLTJ6IiB0cmFuc2Zvcm09InRyYW5zbGF0ZSgxIDEpIi8+PC9zdmc+" />';
 
-    var _play = function () {
+    var _play = function (skipped) {
         var layer, audio;
 
         if (paused) return;
+        skipped = typeof skipped === 'number' ? skipped : 0;
+        if (skipped >= playlist.length) {
+            // None of the markers in the playlist is shown on the map.
+            OFFLINE.AudioPlayer.stop();
+            return;
+        }
         if (playlist_index >= 0 && playlist_index < playlist.length) {
             playlist[playlist_index].closePopup();
         }
@@ -24,17 +160,21 @@ OFFLINE.AudioPlayer = (function () {
         }
         layer = playlist[playlist_index];
         // play only those audio which is currently shown at map bounds
-        if (play_initial_bounds.contains(layer.getLatLng())) {
+        if (map.hasLayer(layer) && play_initial_bounds.contains(layer.getLatLng())) {
             layer.openPopup();
             audio = $('#' + layer.audio_id);
+            if (!audio.length) {
+                // The table row with the audio may not be loaded, so we fall back to the popup.
+                audio = $(layer.getPopup().getElement()).find('audio');
+            }
             if (audio.length) {
                 audio[0].addEventListener('ended', _play);
                 audio[0].play();
             } else {
-                _play();
+                _play(skipped + 1);
             }
         } else {
-            _play();
+            _play(skipped + 1);
         }
     }
 
@@ -62,6 +202,12 @@ OFFLINE.AudioPlayer = (function () {
                 return e2._latlng.lat - e1._latlng.lat
             });
         },
+        update: function (layers) {
+            // The playlist is only replaced while no audio is playing.
+            if (paused) {
+                OFFLINE.AudioPlayer.init(layers);
+            }
+        },
         play: function () {
             if (paused) {
                 paused = false;
@@ -104,7 +250,14 @@ OFFLINE.AudioPlayer = (function () {
 })();
 
 OFFLINE.Map = (function () {
-    var map, markers = [];
+    var map,
+        layer,
+        markers = {},  // language markers, created when first shown
+        cluster_markers = {},
+        shown = [],
+        forms = {},  // forms per language, for parameter pages
+        has_audio = false,
+        tooltip_opts = {permanent: false, opacity: 0.75, interactive: true};
 
     var redDot = L.icon({
         iconUrl: 'data:image/svg+xml;base64,PHN2ZyAgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIgogICAgICB4bWxuczp4bGluaz0iaHR0cDovL3d3dy53My5vcmcvMTk5OS94bGluayIgaGVpZ2h0PSI0MCIgd2lkdGg9IjQwIj4KICA8Y2lyY2xlIGN4PSIyMCIgY3k9IjIwIiByPSIxNCIgc3R5bGU9ImZpbGw6I0ZGMDAwMDtzdHJva2U6YmxhY2s7c3Ryb2tlLXdpZHRoOjFweDtzdHJva2UtbGluZWNhcDpyb3VuZDtzdHJva2UtbGluZWpvaW46cm91bmQ7Ii8+Cjwvc3ZnPg==',
@@ -121,26 +274,157 @@ OFFLINE.Map = (function () {
         return html
     }
 
+    var clusterIcon = function (size) {
+        return L.divIcon({
+            html: '<div><span>' + size + '</span></div>',
+            className: 'marker-cluster',
+            iconSize: [30, 30]
+        });
+    }
+
+    var _tooltip = function (marker, content) {
+        // Tooltips must be re-bound when the "Show Labels" option changes.
+        if (marker.getTooltip() && marker.options.tooltip_permanent === tooltip_opts.permanent) {
+            return;
+        }
+        marker.options.tooltip_permanent = tooltip_opts.permanent;
+        marker.unbindTooltip().bindTooltip(content, tooltip_opts);
+    }
+
+    var _language_marker = function (lid) {
+        var lang = languages[lid], marker, popup_content, fs = '';
+
+        if (markers[lid]) {
+            return markers[lid];
+        }
+        marker = L.marker([lang['latitude'], lang['longitude']], {icon: redDot});
+        if (data['index']) {
+            popup_content = "<b><a href='language-" + lid + "/index.html'>" + lang['name'] + "</a></b>";
+            marker.tooltip_content = lang['name'];
+        } else {
+            for (var f in forms[lid]) {
+                fs += '<i>' + forms[lid][f]['form'] + '</i>; '
+            }
+            popup_content = "<b><a href='../language-" + lid + "/index.html'>" + lang['name'] + ":</a></b> " + fs;
+            for (var f in forms[lid]) {
+                if (forms[lid][f]['audio']) {
+                    marker.audio_id = 'audio-' + lid;
+                    popup_content += "<br>" + audio_element(forms[lid][f]['audio']);
+                }
+            }
+            marker.tooltip_content = fs || lang['name'];
+        }
+        marker.bindPopup(popup_content);
+        markers[lid] = marker;
+        return marker;
+    }
+
+    var _cluster_marker = function (cluster) {
+        var marker = L.marker([cluster[0], cluster[1]], {icon: clusterIcon(cluster[2].length)}),
+            names = [];
+
+        for (var i = 0; i < cluster[2].length && i < 5; i++) {
+            names.push(languages[cluster[2][i]]['name']);
+        }
+        if (cluster[2].length > names.length) {
+            names.push('...');
+        }
+        marker.tooltip_content = names.join(', ');
+        marker.on('click', function () {
+            map.fitBounds(_bounds(cluster[2]), {maxZoom: map.getZoom() + 2});
+        });
+        return marker;
+    }
+
+    var _bounds = function (lids) {
+        return L.latLngBounds(lids.map(function (lid) {
+            return [languages[lid]['latitude'], languages[lid]['longitude']];
+        }));
+    }
+
+    var render = function () {
+        // Only the precomputed clusters for the current zoom level within the viewport are shown.
+        var level = Math.min(map.getZoom(), data['clusters'].length - 1),
+            clusters = data['clusters'][level],
+            bounds = map.getBounds().pad(0.2),
+            playlist = [],
+            next = [],
+            keep = {},
+            marker,
+            key;
+
+        for (var i = 0; i < clusters.length; i++) {
+            if (!bounds.contains([clusters[i][0], clusters[i][1]])) {
+                continue;
+            }
+            if (clusters[i][2].length === 1 || level === data['clusters'].length - 1) {
+                // On the last level, clusters are languages at the same location or cannot be
+                // split by zooming in further, so we show all their markers.
+                for (var l = 0; l < clusters[i][2].length; l++) {
+                    marker = _language_marker(clusters[i][2][l]);
+                    if (marker.audio_id) {
+                        playlist.push(marker);
+                    }
+                    next.push(marker);
+                    keep[L.stamp(marker)] = true;
+                }
+                continue;
+            }
+            key = level + '-' + i;
+            if (!cluster_markers[key]) {
+                cluster_markers[key] = _cluster_marker(clusters[i]);
+            }
+            next.push(cluster_markers[key]);
+            keep[L.stamp(cluster_markers[key])] = true;
+        }
+        // Markers which are still shown are kept, so that open popups stay open.
+        for (var j = 0; j < shown.length; j++) {
+            if (!keep[L.stamp(shown[j])]) {
+                layer.removeLayer(shown[j]);
+            }
+        }
+        for (var k = 0; k < next.length; k++) {
+            _tooltip(next[k], next[k].tooltip_content);
+            if (!layer.hasLayer(next[k])) {
+                layer.addLayer(next[k]);
+            }
+        }
+        shown = next;
+        if (has_audio) {
+            OFFLINE.AudioPlayer.update(playlist);
+        }
+    }
+
     return {
         init: function () {
 
-            var has_audio = false,
-                popup_content,
-                labels
-                tooltip_opts = {permanent: false, opacity: 0.75, interactive: true},
+            var labels,
                 tilesURL = 'tiles/{z}/{x}/{y}.png';
 
-            function updateTooltip(shown) {
-                if (shown) {
-                    map.eachLayer(function (layer) {layer.openTooltip()});
-                } else {
-                    map.eachLayer(function (layer) {layer.closeTooltip()});
+            function updateTooltip(shown_) {
+                tooltip_opts.permanent = shown_;
+                for (var m = 0; m < shown.length; m++) {
+                    _tooltip(shown[m], shown[m].tooltip_content);
+                }
+            }
+
+            function addForms(fs) {
+                for (var l in fs) {
+                    forms[l] = fs[l];
+                    for (var f in fs[l]) {
+                        if (fs[l][f]['audio']) {
+                            has_audio = true;
+                        }
+                    }
                 }
-                tooltip_opts.permanent = shown;
-                for (var m in markers) {
-                    var t = markers[m].getTooltip();
-                    markers[m].unbindTooltip().bindTooltip(t, tooltip_opts);
+            }
+
+            function finish() {
+                if (has_audio) {
+                    OFFLINE.AudioPlayer.addToMap(map);
+                    OFFLINE.AudioPlayer.init([]);
                 }
+                render();
             }
 
             if (!data['index']) {
@@ -163,48 +447,205 @@ OFFLINE.Map = (function () {
             labels.on('remove', function() { updateTooltip(false); });
             L.control.layers({}, {"Show Labels": labels}, {collapsed:false}).addTo(map);
 
-            // bind popup with language name and transcription and audio element
-            tooltip_opts.permanent = false;
-            for (var l in data['languages']) {
-                lang = data['languages'][l];
-                if (data['index']) {
-                    popup_content = "<b><a href='language-" + lang['ID'] + "/index.html'>" + lang['Name'] + "</a></b>";
-                    marker = L.marker([lang['latitude'], lang['longitude']], {icon: redDot}).addTo(map);
-                    marker.bindPopup(popup_content);
-                    marker.bindTooltip(lang['Name'], tooltip_opts);
-                } else {
-                    forms = '';
-                    for (var f in data['forms'][l]) {
-                        forms += '<i>' + data['forms'][l][f]['form'] + '</i>; '
-                    }
-                    popup_content = "<b><a href='../language-" + lang['ID'] + "/index.html'>" + lang['Name'] + ":</a></b> " + forms;
-                    marker = L.marker([lang['latitude'], lang['longitude']], {icon: redDot}).addTo(map);
-                    for (var f in data['forms'][l]) {
-                        if (data['forms'][l][f]['audio']) {
-                            marker.audio_id = 'audio-' + l;
-                            has_audio = true;
-                            popup_content += "<br>" + audio_element(data['forms'][l][f]['audio']);
-                        }
+            layer = L.layerGroup().addTo(map);
+            if (data['clusters'][0].length) {
+                map.fitBounds(_bounds([].concat.apply([], data['clusters'][0].map(function (c) { return c[2]; }))));
+            } else {
+                map.fitWorld();
+            }
+            map.on('zoomend moveend', render);
+
+            if (data['chunks']) {
+                // Forms for the popups are read from the same chunks as the table rows.
+                render();
+                OFFLINE.Chunks.loadAll(function (chunk) { addForms(chunk['forms']); }, function () {
+                    // Markers created before all forms were loaded must be re-created.
+                    markers = {};
+                    finish();
+                });
+                return;
+            }
+            if (!data['index']) {
+                addForms(data['forms']);
+            }
+            finish();
+        }
+    }
+})();
+
+OFFLINE.Navigation = (function () {
+    // Maximal number of items listed in a dropdown at once; more can be reached by filtering.
+    var max_items = 500;
+
+    var _fill = function (menu) {
+        var items = navigation[menu.data('nav')],
+            prefix = menu.data('prefix'),
+            query = menu.find('.nav-filter').val().toLowerCase(),
+            container = menu.find('.nav-items'),
+            elements = [],
+            matches = 0;
+
+        for (var i = 0; i < items.length; i++) {
+            if (query && items[i][1].toLowerCase().indexOf(query) < 0) {
+                continue;
+            }
+            matches++;
+            if (elements.length < max_items) {
+                elements.push(
+                    $('<a class="dropdown-item"></a>')
+                        .attr('href', prefix + items[i][0] + '/index.html')
+                        .text(items[i][1])[0]);
+            }
+        }
+        if (matches > elements.length) {
+            elements.push(
+                $('<span class="dropdown-item-text text-muted"></span>')
+                    .text((matches - elements.length) + ' more - refine the filter')[0]);
+        }
+        container.empty().append(elements);
+    }
+
+    return {
+        init: function () {
+            $('.nav-list').each(function () {
+                var menu = $(this), filled = false;
+
+                // The lists are only turned into DOM elements when a dropdown is opened.
+                menu.parent().on('show.bs.dropdown', function () {
+                    if (!filled) {
+                        _fill(menu);
+                        filled = true;
                     }
-                    marker.bindPopup(popup_content);
-                    marker.bindTooltip(forms, tooltip_opts);
+                });
+                menu.parent().on('shown.bs.dropdown', function () {
+                    menu.find('.nav-filter').trigger('focus');
+                });
+                menu.find('.nav-filter').on('input', function () {
+                    _fill(menu);
+                });
+            });
+        }
+    }
+})();
+
+OFFLINE.Search = (function () {
+    // Normalization and tokenization must match cldfofflinebrowser/search.py
+    var prefix_length = 2, max_results = 50, input, results, timeout;
+
+    var normalize = function (s) {
+        return s.normalize('NFKD').replace(/\p{M}/gu, '').toLowerCase();
+    }
+
+    var tokenize = function (s) {
+        return s.split(/[^\p{L}\p{N}]+/u).filter(function (w) { return w.length > 0; });
+    }
+
+    var shard_key = function (word) {
+        return Array.from(word).slice(0, prefix_length).map(function (c) {
+            return c.codePointAt(0).toString(16);
+        }).join('-');
+    }
+
+    var _matches = function (word) {
+        // Documents containing a word starting with `word`, keyed by URL and label. Words shorter
+        // than the prefix length have a shard of their own, thus only match exactly.
+        var shard = OFFLINE.search[shard_key(word)], res = {}, doc;
+
+        if (!shard) return res;
+        for (var w in shard['words']) {
+            if (w.indexOf(word) === 0) {
+                for (var i = 0; i < shard['words'][w].length; i++) {
+                    doc = shard['docs'][shard['words'][w][i]];
+                    res[doc[0] + '\t' + doc[1] + '\t' + doc[2]] = doc;
                 }
-                markers.push(marker);
             }
+        }
+        return res;
+    }
 
-            var group = new L.featureGroup(markers);
-            map.fitBounds(group.getBounds());
+    var _show = function (words, query) {
+        var docs = null, matches, elements = [], count = 0;
 
-            if (has_audio) {
-                OFFLINE.AudioPlayer.addToMap(map);
-                OFFLINE.AudioPlayer.init(markers);
+        if (query !== input.val()) return;  // outdated
+        for (var i = 0; i < words.length; i++) {
+            matches = _matches(words[i]);
+            if (docs === null) {
+                docs = matches;
+            } else {
+                for (var key in docs) {
+                    if (!matches[key]) delete docs[key];
+                }
             }
         }
+        for (var key in docs) {
+            count++;
+            if (elements.length < max_results) {
+                elements.push(
+                    $('<a class="dropdown-item"></a>')
+                        .attr('href', input.data('prefix') + docs[key][0])
+                        .text(docs[key][1])
+                        .append($('<small class="text-muted ml-2"></small>').text(docs[key][2]))[0]);
+            }
+        }
+        if (count === 0) {
+            elements.push($('<span class="dropdown-item-text text-muted">No results</span>')[0]);
+        } else if (count > elements.length) {
+            elements.push(
+                $('<span class="dropdown-item-text text-muted"></span>')
+                    .text((count - elements.length) + ' more - refine the search')[0]);
+        }
+        results.empty().append(elements).addClass('show');
+    }
+
+    var search = function () {
+        var query = input.val(),
+            words = tokenize(normalize(query)),
+            pending;
+
+        if (!words.length) {
+            results.removeClass('show');
+            return;
+        }
+        // Load only the shards needed for the words of the query.
+        pending = words.length;
+        for (var i = 0; i < words.length; i++) {
+            OFFLINE.Scripts.load(input.data('prefix') + 'search/' + shard_key(words[i]) + '.js', function () {
+                pending--;
+                if (pending === 0) {
+                    _show(words, query);
+                }
+            });
+        }
+    }
+
+    return {
+        init: function () {
+            input = $('#search-input');
+            results = $('#search-results');
+            input.on('input', function () {
+                clearTimeout(timeout);
+                timeout = setTimeout(search, 150);
+            });
+            input.on('focus', function () {
+                if (results.children().length && input.val()) results.addClass('show');
+            });
+            input.on('keydown', function (e) {
+                if (e.key === 'Escape') results.removeClass('show');
+            });
+            $(document).on('click', function (e) {
+                if (!$(e.target).closest('.search-dropdown').length) results.removeClass('show');
+            });
+        }
     }
 })();
 
 
 $(document).ready(function () {
+    OFFLINE.Navigation.init();
+    OFFLINE.Search.init();
+    if($("#chunked-table").length > 0) {
+        OFFLINE.Table.init();
+    }
     if($("#map").length > 0) {
         OFFLINE.Map.init();
     }
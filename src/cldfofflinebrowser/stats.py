@@ -0,0 +1,124 @@
+"""
+Statistics about the phases of creating an offline browser: wall time, peak memory, number of items
+processed and files and bytes written.
+
+Notes: Phases may run concurrently, and peak memory is measured for the process (or the biggest of
+its finished child processes, e.g. render workers), so the peak memory reported for a phase is the
+peak reached at the end of the phase.
+"""
+import sys
+import json
+import time
+import pathlib
+import threading
+import contextlib
+import dataclasses
+from typing import Any, Optional
+from collections.abc import Generator, Iterable
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # Not available on Windows.
+
+from .output import Sink, CountingSink
+
+__all__ = ['Phase', 'Stats', 'peak_rss']
+
+
+def peak_rss() -> Optional[float]:
+    """Peak resident set size in MB, or `None` if it can't be determined."""
+    if resource is None:  # pragma: no cover
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is given in bytes on macOS, in kilobytes elsewhere.
+    return round(peak / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+
+@dataclasses.dataclass
+class Phase:
+    """Statistics of one phase."""
+    name: str
+    sink: Optional[Sink] = None
+    seconds: float = 0.0
+    items: int = 0
+    peak_rss_mb: Optional[float] = None
+
+    def count(self, items: Iterable) -> Generator[Any, None, None]:
+        """Count the items of an iterable as processed in this phase."""
+        for item in items:
+            self.items += 1
+            yield item
+
+    def as_dict(self) -> dict[str, Any]:  # pylint: disable=C0116
+        res = {
+            'seconds': round(self.seconds, 3),
+            'peak_rss_mb': self.peak_rss_mb,
+            'items': self.items,
+            'items_per_second': round(self.items / self.seconds, 1) if self.seconds else None,
+        }
+        if isinstance(self.sink, CountingSink):
+            res.update(files=self.sink.files, bytes=self.sink.bytes)
+        return res
+
+
+class Stats:
+    """
+    Collect statistics for the phases of a build.
+
+    If `count_output` is `True`, files and bytes written by a phase are counted by wrapping the
+    sink passed into `Stats.phase`.
+    """
+    def __init__(self, count_output: bool = True):
+        self.count_output = count_output
+        self.phases = {}
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, sink: Optional[Sink] = None) -> Generator[Phase, None, None]:
+        """
+        Measure a phase, yielding a `Phase` object, whose `sink` must be used to write files.
+        """
+        phase = Phase(name, sink=CountingSink(sink) if sink and self.count_output else sink)
+        with self.lock:
+            self.phases[name] = phase
+        start = time.perf_counter()
+        yield phase
+        phase.seconds = time.perf_counter() - start
+        phase.peak_rss_mb = peak_rss()
+
+    def report(self) -> dict[str, Any]:
+        """A JSON serializable report of the statistics."""
+        phases = {name: phase.as_dict() for name, phase in self.phases.items()}
+        return {
+            'phases': phases,
+            'total': {
+                'seconds': round(time.perf_counter() - self.start, 3),
+                'peak_rss_mb': peak_rss(),
+                'files': sum(p.get('files', 0) for p in phases.values()),
+                'bytes': sum(p.get('bytes', 0) for p in phases.values()),
+            },
+        }
+
+    def write(self, path: pathlib.Path):
+        """Write the report as JSON to a file."""
+        pathlib.Path(path).write_text(json.dumps(self.report(), indent=2), encoding='utf8')
+
+    def log(self, log):
+        """Log the report as table."""
+        report = self.report()
+        log.info(
+            '%-18s %9s %9s %9s %9s %12s', 'phase', 'seconds', 'items', 'items/s', 'files', 'bytes')
+        for name, phase in list(report['phases'].items()) + [('total', report['total'])]:
+            log.info(
+                '%-18s %9.2f %9s %9s %9s %12s',
+                name,
+                phase['seconds'],
+                phase.get('items', ''),
+                phase.get('items_per_second') or '',
+                phase.get('files', ''),
+                phase.get('bytes', ''))
+        log.info('Peak RSS: %s MB', report['total']['peak_rss_mb'])
@@ -0,0 +1,155 @@
+"""
+Synthetic CLDF Wordlists and a stub tile server, to exercise the offline browser at scale.
+
+Datasets are generated deterministically from a seed, so benchmark runs are comparable.
+"""
+import zlib
+import random
+import struct
+import pathlib
+import threading
+import dataclasses
+import http.server
+from typing import Optional
+
+from pycldf import Wordlist
+
+from .osmtiles import TileServer
+
+__all__ = ['Scale', 'write_wordlist', 'StubTileServer']
+
+
+def _png_chunk(type_: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + type_ + data \
+        + struct.pack('>I', zlib.crc32(type_ + data))
+
+
+# A minimal PNG: A 1x1 pixel, 8-bit greyscale image.
+PNG = b'\x89PNG\r\n\x1a\n' \
+    + _png_chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 0, 0, 0, 0)) \
+    + _png_chunk(b'IDAT', zlib.compress(b'\x00\xff')) \
+    + _png_chunk(b'IEND', b'')
+
+# An MPEG audio frame of silence. Audio files are only copied, so they need not be playable.
+MP3 = bytes.fromhex('fffb9064') + bytes(413)
+
+SYLLABLES = [
+    onset + nucleus
+    for onset in ['', 'p', 't', 'k', 'ʈ', 'm', 'n', 'ŋ', 's', 'ʃ', 'l', 'r', 'w', 'j']
+    for nucleus in ['a', 'e', 'i', 'o', 'u', 'ə', 'á', 'ĩ']]
+
+
+@dataclasses.dataclass(frozen=True)
+class Scale:
+    """Size and shape of a synthetic dataset."""
+    languages: int = 10
+    parameters: int = 10
+    # Number of forms. Forms are assigned to random pairs of language and parameter, thus some
+    # pairs get synonyms, others no forms at all.
+    forms: int = 50
+    # Number of forms with an audio file.
+    media: int = 0
+    # Languages are spread over a box of `spread` degrees around `center`.
+    spread: float = 10.0
+    center: tuple[float, float] = (0.0, 0.0)
+
+
+def _word(rng: random.Random) -> str:
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+
+
+def write_wordlist(
+        directory: pathlib.Path,
+        scale: Scale,
+        seed: int = 0,
+        title: Optional[str] = None,
+) -> pathlib.Path:
+    """
+    Write a synthetic CLDF Wordlist to `directory`.
+
+    Audio files are written to `directory/audio/` and referenced with relative URLs.
+
+    Returns the path of the metadata file.
+    """
+    rng = random.Random(seed)
+    directory = pathlib.Path(directory)
+    ds = Wordlist.in_dir(directory)
+    ds.properties['dc:title'] = title or \
+        f'Synthetic wordlist ({scale.languages} languages, {scale.forms} forms)'
+    ds.add_component('LanguageTable')
+    ds.add_component('ParameterTable')
+
+    lat, lon = scale.center
+    languages = [
+        {
+            'ID': f'l{i}',
+            'Name': _word(rng).capitalize(),
+            'Latitude': round(lat + rng.uniform(-scale.spread, scale.spread) / 2, 4),
+            'Longitude': round(lon + rng.uniform(-scale.spread, scale.spread) / 2, 4),
+        } for i in range(scale.languages)]
+    parameters = [{'ID': f'p{i}', 'Name': _word(rng)} for i in range(scale.parameters)]
+    forms = []
+    for i in range(scale.forms):
+        form = _word(rng)
+        forms.append({
+            'ID': f'f{i}',
+            'Language_ID': rng.choice(languages)['ID'],
+            'Parameter_ID': rng.choice(parameters)['ID'],
+            'Form': form,
+            'Segments': list(form),
+        })
+
+    tables = dict(LanguageTable=languages, ParameterTable=parameters, FormTable=forms)
+    if scale.media:
+        ds.add_component(
+            'MediaTable',
+            {
+                'name': 'Form_ID',
+                'propertyUrl': 'http://cldf.clld.org/v1.0/terms.rdf#formReference',
+            })
+        directory.joinpath('audio').mkdir(exist_ok=True)
+        tables['MediaTable'] = []
+        for form in rng.sample(forms, min(scale.media, len(forms))):
+            mid = f"m{form['ID']}"
+            directory.joinpath('audio', f'{mid}.mp3').write_bytes(MP3)
+            tables['MediaTable'].append({
+                'ID': mid,
+                'Media_Type': 'audio/mpeg',
+                'Download_URL': f'audio/{mid}.mp3',
+                'Form_ID': form['ID'],
+            })
+    return ds.write(**tables)
+
+
+class _TileHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=C0103,C0116
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(PNG)))
+        self.end_headers()
+        self.wfile.write(PNG)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        pass
+
+
+class StubTileServer(TileServer):
+    """
+    A tile server, serving the same small PNG for any tile from a thread in this process.
+
+    Since no mbtiles file is read, the server can be used to exercise tile retrieval without
+    installing `tileserver-gl`.
+    """
+    def __init__(self, mbtiles_path: Optional[pathlib.Path] = None, port: int = 0):
+        super().__init__(mbtiles_path, port)
+        self.httpd = None
+
+    def __enter__(self):
+        self.httpd = http.server.ThreadingHTTPServer(('localhost', self.port), _TileHandler)
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -1,32 +1,79 @@
 """
 Functionality to render Jinja2 templates.
 """
-import json
 import pathlib
+import itertools
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections.abc import Callable, Iterable
 from typing import Literal, Any, Optional
 
-from jinja2 import Environment, PackageLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, PackageLoader, select_autoescape
 
 import cldfofflinebrowser
+from cldfofflinebrowser.assets import bundle_names
+from cldfofflinebrowser.jsdata import write_js
+from cldfofflinebrowser.output import Sink, MemorySink
+from cldfofflinebrowser.pipeline import batched, ordered_map
 
-__all__ = ['render_directory']
+__all__ = [
+    'render_directory', 'render_directories', 'render_navigation', 'render_shared_data']
 
-env = Environment(
-    loader=PackageLoader(cldfofflinebrowser.__name__, 'templates'),
-    autoescape=select_autoescape([])
-)
-env.filters.update(jsondumps=json.dumps, len=len)
 
+@functools.lru_cache(maxsize=None)
+def get_env() -> Environment:
+    """
+    The Jinja2 environment, created on first use.
+
+    Compiled templates are cached as bytecode in a directory below the system's temporary directory,
+    so they are re-used by worker processes and later runs.
+    """
+    try:
+        bytecode_cache = FileSystemBytecodeCache()
+    except RuntimeError:  # pragma: no cover
+        bytecode_cache = None  # The cache directory could not be created.
+    env = Environment(
+        loader=PackageLoader(cldfofflinebrowser.__name__, 'templates'),
+        autoescape=select_autoescape([]),
+        bytecode_cache=bytecode_cache,
+    )
+    env.filters.update(len=len)
+    env.globals.update(assets=bundle_names())
+    return env
+
+
+# A page to be rendered, specified as (type_, id_, obj, json_data).
+PageType = tuple[str, Optional[str], Optional[dict[str, Any]], dict[str, Any]]
 
-def _render(out, template, **vars_):
-    out = pathlib.Path(out)
-    if out.is_dir():
-        out = out / template
-    out.write_text(env.get_template(template).render(**vars_), encoding='utf8')
+# Arguments shared by all pages rendered in one (worker) process.
+_shared = {}
+
+
+def _render(sink: Sink, path: str, template: str, **vars_):
+    sink.write_text(path, get_env().get_template(template).render(**vars_))
+
+
+def _chunked(json_data: dict[str, Any], chunk_size: int) -> list[dict[str, Any]]:
+    """
+    Split the page data into chunks of about `chunk_size` rows, keeping all forms for one language
+    (or parameter) in the same chunk.
+    """
+    keys, rows = [[]], 0
+    for key, forms in json_data['forms'].items():
+        if keys[-1] and rows + len(forms) > chunk_size:
+            keys.append([])
+            rows = 0
+        keys[-1].append(key)
+        rows += len(forms)
+    return [
+        {k: {key: v[key] for key in chunk_keys if key in v}
+         for k, v in json_data.items() if isinstance(v, dict)}
+        for chunk_keys in keys]
 
 
 def render_directory(  # pylint: disable=R0913,R0917
-        outdir: pathlib.Path,
+        sink: Sink,
         type_: Literal['language', 'parameter', 'index'],
         id_: Optional[str],
         obj: Optional[dict[str, Any]],
@@ -34,26 +81,110 @@ def render_directory(  # pylint: disable=R0913,R0917
         max_zoom,
         tmpl_context,
         has_any_audio: bool = False,
+        chunk_size: int = 0,
 ):
     """
     Create a directory for the offline browser, containing the data for one language, one parameter
     or the index.
+
+    If `chunk_size` is positive and the page has more table rows, `index.html` is only a shell and
+    the rows are split into files `data-<i>.js`, which are loaded on demand.
     """
-    if type_ == 'index':
-        pout = outdir
-    else:
-        pout = outdir / f'{type_}-{id_}'
-    if not pout.exists():
-        pout.mkdir()
-    _render(
-        pout,
-        'data.js',
-        data=json_data,
-        options={'minZoom': 0, 'maxZoom': max_zoom})
+    pout = pathlib.PurePosixPath('.' if type_ == 'index' else f'{type_}-{id_}')
+    chunks = _chunked(json_data, chunk_size) if chunk_size > 0 and type_ != 'index' else []
+    if len(chunks) > 1:
+        for i, chunk in enumerate(chunks):
+            write_js(sink, pout / f'data-{i}.js', {f'OFFLINE.chunks[{i}]': chunk})
+        json_data = {
+            k: v for k, v in json_data.items() if not isinstance(v, dict)}
+        json_data['chunks'] = [sum(len(fs) for fs in chunk['forms'].values()) for chunk in chunks]
+    write_js(
+        sink, pout / 'data.js', {'data': json_data, 'options': {'minZoom': 0, 'maxZoom': max_zoom}})
     context = {'index': type_ == 'index', 'data': json_data}
     if type_ == 'index':
         context['has_any_audio'] = has_any_audio
     else:
         context[type_] = obj
     context.update(tmpl_context)
-    _render(pout / 'index.html', f'{type_}.html', **context)
+    _render(sink, pout / 'index.html', f'{type_}.html', **context)
+
+
+def render_shared_data(sink: Sink, name: str, value: Any):
+    """
+    Write data shared by many pages to a file `<name>.js`, assigning it to a variable.
+    """
+    write_js(sink, f'{name}.js', {name: value})
+
+
+def render_navigation(sink: Sink, tmpl_context):
+    """
+    Write the languages and parameters listed in the navigation menus to a file shared by all pages.
+    """
+    render_shared_data(
+        sink,
+        'navigation',
+        {
+            key: [[id_, obj['name']] for id_, obj in tmpl_context[key]]
+            for key in ['languages', 'parameters']})
+
+
+def _init_worker(sink, max_zoom, tmpl_context, chunk_size):
+    _shared.update(sink=sink, max_zoom=max_zoom, tmpl_context=tmpl_context, chunk_size=chunk_size)
+
+
+def _render_page(page: PageType) -> Optional[dict[str, bytes]]:
+    type_, id_, obj, json_data = page
+    # For sinks which cannot be written to from worker processes the rendered files are returned.
+    sink = _shared['sink'] or MemorySink()
+    render_directory(
+        sink,
+        type_,
+        id_,
+        obj,
+        json_data,
+        _shared['max_zoom'],
+        _shared['tmpl_context'],
+        chunk_size=_shared['chunk_size'])
+    return None if _shared['sink'] else sink.files
+
+
+def _render_pages(pages: list[PageType]) -> list[Optional[dict[str, bytes]]]:
+    return [_render_page(page) for page in pages]
+
+
+def render_directories(  # pylint: disable=R0913,R0917
+        sink: Sink,
+        pages: Iterable[PageType],
+        max_zoom,
+        tmpl_context,
+        jobs: int = 1,
+        chunk_size: int = 0,
+        progress: Optional[Callable[..., Iterable]] = None,
+):
+    """
+    Render directories for many languages or parameters.
+
+    `progress` is a function to wrap the iteration over rendered pages with, e.g. `tqdm`.
+
+    With `jobs > 1` pages are rendered in a pool of worker processes. Since each page is written to
+    its own directory - and pages rendered in workers are written to non-shareable sinks in order -
+    the output is identical to rendering serially. Pages are passed to the workers in chunks, and
+    only a few chunks per worker are in flight at any time, so `pages` is consumed lazily.
+    """
+    progress = progress or (lambda things: things)
+    if jobs <= 1:
+        for page in progress(pages):
+            render_directory(
+                sink, *page, max_zoom, tmpl_context, chunk_size=chunk_size)
+        return
+    with ProcessPoolExecutor(
+            max_workers=jobs,
+            # Forking is unsafe if other build phases are running in threads.
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(sink if sink.shareable else None, max_zoom, tmpl_context, chunk_size),
+    ) as executor:
+        results = ordered_map(executor, _render_pages, batched(pages, 16), 2 * jobs)
+        for files in progress(itertools.chain.from_iterable(results)):
+            for path, content in (files or {}).items():
+                sink.write_bytes(path, content)
@@ -1,2 +0,0 @@
-data = {{ data | jsondumps }};
-options = {{ options | jsondumps }};
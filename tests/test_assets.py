@@ -0,0 +1,21 @@
+from cldfofflinebrowser.assets import minify_css, minify_js, static_files, bundle_names
+
+
+def test_minify_css():
+    assert minify_css('/* x */\n.a  > .b {\n  color: red;\n  margin: 0 1px;\n}\n/*! license */') \
+        == '.a>.b{color: red;margin: 0 1px}/*! license */'
+
+
+def test_minify_js():
+    assert minify_js('// x\nfunction f() {\n    // y\n    return 1; // z\n}\n\n') == \
+        'function f() {\nreturn 1; // z\n}'
+
+
+def test_static_files():
+    files = static_files()
+    names = bundle_names()
+    assert set(names) == {'js', 'css'}
+    assert b'OFFLINE.Map' in files[names['js']]
+    assert b'.marker-cluster' in files[names['css']]
+    assert 'static/fullscreen.png' in files
+    assert 'static/offline.js' not in files
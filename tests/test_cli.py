@@ -1,7 +1,16 @@
+import json
+import logging
 import pathlib
+import zipfile
+import tempfile
 
+import pytest
 from cldfbench.__main__ import main
 
+from cldfofflinebrowser.assets import bundle_names, static_files
+from cldfofflinebrowser.commands.batch import iter_batch
+from cldfofflinebrowser.synthetic import StubTileServer
+
 
 def test_create(tmpdir):
     out = pathlib.Path(str(tmpdir)) / 'offline'
@@ -9,9 +18,26 @@ def test_create(tmpdir):
     main(['offline.create', str(ds), '--outdir', str(out)])
     assert not out.joinpath('parameter-1', 'ask-1-1.wav').exists()
     assert out.joinpath('tiles', '0', '0', '0.png').is_file()
+    assert 'navigation = ' in out.joinpath('navigation.js').read_text(encoding='utf8')
+    assert 'dropdown-item' not in \
+        out.joinpath('parameter-1', 'index.html').read_text(encoding='utf8')
+    assert '"latitude"' in out.joinpath('languages.js').read_text(encoding='utf8')
+    assert '"latitude"' not in out.joinpath('parameter-1', 'data.js').read_text(encoding='utf8')
+    assert '"clusters":[[' in out.joinpath('data.js').read_text(encoding='utf8')
+    assert out.joinpath('search', '62-6c.js').exists(), 'shard for "blood"'
+    assert sorted(p.name for p in out.joinpath('static').iterdir()) == sorted(
+        pathlib.PurePosixPath(p).name for p in static_files())
 
+    # Stale static files of earlier builds are removed when re-building:
+    out.joinpath('static', 'leaflet.js').write_text('', encoding='utf8')
+    out.joinpath('static', 'bundle.000000000000.js').write_text('', encoding='utf8')
     main(['offline.create', str(ds), '--outdir', str(out), '--with-audio'])
     assert out.joinpath('parameter-1', 'ask-1-1.wav').exists()
+    assert sorted(p.name for p in out.joinpath('static').iterdir()) == sorted(
+        pathlib.PurePosixPath(p).name for p in static_files())
+
+    main(['offline.create', str(ds), '--outdir', str(out), '--chunk-size', '1'])
+    assert out.joinpath('language-ask', 'data-1.js').exists()
 
     main(['offline.create', str(ds), '--outdir', str(out.parent / 'o'), '--include', '5'])
     assert not out.parent.joinpath('o', 'parameter-1').exists()
@@ -22,3 +48,107 @@ def test_custom_names(tmpdir):
     ds = pathlib.Path(__file__).parent / 'dataset-custom-names' / 'cldf'
     main(['offline.create', str(ds), '--outdir', str(out), '--with-audio'])
     assert out.joinpath('parameter-1', 'ask-1-1.wav').exists()
+
+
+def test_create_parallel(tmp_path):
+    ds = pathlib.Path(__file__).parent / 'dataset' / 'cldf'
+    main(['offline.create', str(ds), '--outdir', str(tmp_path / 'serial'), '--with-audio'])
+    main([
+        'offline.create', str(ds), '--outdir', str(tmp_path / 'parallel'), '--with-audio',
+        '--jobs', '2'])
+    serial = {
+        p.relative_to(tmp_path / 'serial'): p.read_bytes()
+        for p in tmp_path.joinpath('serial').glob('**/*') if p.is_file()}
+    parallel = {
+        p.relative_to(tmp_path / 'parallel'): p.read_bytes()
+        for p in tmp_path.joinpath('parallel').glob('**/*') if p.is_file()}
+    assert serial == parallel
+
+
+def test_create_zip(tmp_path):
+    ds = pathlib.Path(__file__).parent / 'dataset' / 'cldf'
+    main(['offline.create', str(ds), '--outdir', str(tmp_path / 'dir'), '--with-audio'])
+    main([
+        'offline.create', str(ds), '--outdir', str(tmp_path / 'build.zip'), '--with-audio',
+        '--jobs', '2'])
+    files = {
+        p.relative_to(tmp_path / 'dir').as_posix(): p.read_bytes()
+        for p in tmp_path.joinpath('dir').glob('**/*') if p.is_file()}
+    with zipfile.ZipFile(tmp_path / 'build.zip') as zf:
+        assert {n: zf.read(n) for n in zf.namelist()} == files
+
+
+def test_create_zip_deterministic(tmp_path, mocker):
+    tmpfiles = mocker.spy(tempfile, 'TemporaryFile')
+    for name in ['a.zip', 'b.zip']:
+        main([
+            'offline.create', str(pathlib.Path(__file__).parent / 'dataset' / 'cldf'),
+            '--outdir', str(tmp_path / name), '--with-audio', '--download-jobs', '2'])
+    assert tmp_path.joinpath('a.zip').read_bytes() == tmp_path.joinpath('b.zip').read_bytes()
+    # Entries are not staged as files, but written to one temporary archive per writing thread:
+    with zipfile.ZipFile(tmp_path / 'a.zip') as zf:
+        assert tmpfiles.call_count < len(zf.namelist()) / 10
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['a.zip', 'b.zip']
+
+
+def test_create_stats(tmp_path, caplog):
+    ds = pathlib.Path(__file__).parent / 'dataset' / 'cldf'
+    with caplog.at_level(logging.INFO):
+        main([
+            'offline.create', str(ds), '--outdir', str(tmp_path / 'offline'), '--with-audio',
+            '--profile', '--stats-json', str(tmp_path / 'stats.json')])
+    assert any('page_render' in r.message for r in caplog.records)
+    stats = json.loads(tmp_path.joinpath('stats.json').read_text(encoding='utf8'))
+    assert set(stats['phases']) == {
+        'parse', 'audio_resolution', 'static', 'default_tiles', 'audio_fetch', 'page_render'}
+    assert stats['phases']['audio_fetch']['files'] == 2
+    assert stats['total']['files'] == sum(
+        1 for p in tmp_path.joinpath('offline').glob('**/*') if p.is_file())
+
+
+def test_create_zip_tiles(tmp_path, mocker):
+    mocker.patch('cldfofflinebrowser.osmtiles.TileServer', StubTileServer)
+    tmp_path.joinpath('world.mbtiles').write_bytes(b'')
+    main([
+        'offline.create', str(pathlib.Path(__file__).parent / 'dataset' / 'cldf'),
+        '--outdir', str(tmp_path / 'build.zip'), '--tiles', str(tmp_path / 'world.mbtiles'),
+        '--max-zoom', '5', '--download-jobs', '2'])
+    with zipfile.ZipFile(tmp_path / 'build.zip') as zf:
+        names = zf.namelist()
+    assert len(names) == len(set(names))
+    assert 'tiles/5/22/12.png' in names
+
+
+def test_iter_batch(tmp_path):
+    batch = tmp_path / 'batch.txt'
+    batch.write_text(
+        '# dataset outdir\n'
+        'my datasets/wl out  # comment\n'
+        'ds\tmy out\n'
+        'ds#1 out#2\n',
+        encoding='utf8')
+    assert list(iter_batch(batch)) == [
+        ('my datasets/wl', pathlib.Path('out')),
+        ('ds', pathlib.Path('my out')),
+        ('ds#1', pathlib.Path('out#2'))]
+
+    batch.write_text('\nds\n', encoding='utf8')
+    with pytest.raises(ValueError, match=r'batch\.txt:2:'):
+        list(iter_batch(batch))
+
+
+def test_batch(tmp_path):
+    datasets = pathlib.Path(__file__).parent
+    tmp_path.joinpath('batch.txt').write_text(
+        '# dataset outdir\n\n{} {}\n{} {}\n'.format(
+            datasets / 'dataset' / 'cldf', tmp_path / 'a',
+            datasets / 'dataset-custom-names' / 'cldf', tmp_path / 'b.zip'),
+        encoding='utf8')
+    main([
+        'offline.batch', str(tmp_path / 'batch.txt'),
+        '--shared-dir', str(tmp_path / 'shared'), '--with-audio', '--parallel', '2'])
+    assert tmp_path.joinpath('a', 'parameter-1', 'ask-1-1.wav').exists()
+    assert tmp_path.joinpath('a', 'static', 'fullscreen.png').stat().st_ino == \
+        tmp_path.joinpath('shared', 'static', 'fullscreen.png').stat().st_ino
+    with zipfile.ZipFile(tmp_path / 'b.zip') as zf:
+        assert bundle_names()['js'] in zf.namelist()
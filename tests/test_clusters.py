@@ -0,0 +1,26 @@
+from cldfofflinebrowser.clusters import cluster_pyramid
+
+
+def test_cluster_pyramid():
+    coords = [('a', (10.0, 10.0)), ('b', (10.1, 10.1)), ('c', (-40.0, 120.0))]
+    pyramid = cluster_pyramid(coords, 14)
+    assert [len(level) for level in pyramid[:2]] == [2, 2]
+    assert sorted(c[2] for c in pyramid[0]) == [['a', 'b'], ['c']]
+    assert len(pyramid) < 15, 'truncated once all locations are separated'
+    assert len(pyramid[-1]) == 3
+    assert all(len(c[2]) == 1 for c in pyramid[-1])
+
+
+def test_cluster_pyramid_colocated():
+    pyramid = cluster_pyramid([('a', (1.0, 1.0)), ('b', (1.0, 1.0))], 10)
+    assert pyramid == [[[1.0, 1.0, ['a', 'b']]]]
+
+
+def test_cluster_pyramid_max_zoom():
+    pyramid = cluster_pyramid([('a', (10.0, 10.0)), ('b', (10.001, 10.001))], 3)
+    assert len(pyramid) == 4
+    assert len(pyramid[-1]) == 1
+
+
+def test_cluster_pyramid_empty():
+    assert cluster_pyramid([], 5) == [[]]
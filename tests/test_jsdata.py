@@ -0,0 +1,38 @@
+import io
+import json
+import decimal
+
+import pytest
+
+from cldfofflinebrowser.jsdata import dump_js, write_js, orjson
+from cldfofflinebrowser.output import DirectorySink
+
+
+@pytest.mark.parametrize(
+    'use_orjson',
+    [pytest.param(True, marks=pytest.mark.skipif(orjson is None, reason='orjson not installed')),
+     False])
+def test_dump_js(use_orjson):
+    fp = io.BytesIO()
+    dump_js(
+        fp,
+        {
+            'data': {'a': [1, 2.5, None], 'b': 'äü', 'c': {'y', 'x'}, 'd': {1: [[]], 'e': {}}},
+            'x': decimal.Decimal('1.5'),
+            'y': [],
+        },
+        use_orjson=use_orjson)
+    assert fp.getvalue().decode('utf8') == \
+        'data = {"a":[1,2.5,null],"b":"äü","c":["x","y"],"d":{"1":[[]],"e":{}}};\n' \
+        'x = 1.5;\ny = [];\n'
+
+
+def test_dump_js_error():
+    with pytest.raises(TypeError):
+        dump_js(io.BytesIO(), {'x': object()}, use_orjson=False)
+
+
+def test_write_js(tmp_path):
+    write_js(DirectorySink(tmp_path), 'data.js', {'data': {'k': 'v'}})
+    text = tmp_path.joinpath('data.js').read_text(encoding='utf8')
+    assert json.loads(text.partition(' = ')[2].rstrip(';\n')) == {'k': 'v'}
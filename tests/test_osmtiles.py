@@ -1,11 +1,14 @@
+import io
 import logging
 import pathlib
 import contextlib
+import zipfile
 import dataclasses
 
 import pytest
 
 from cldfofflinebrowser import osmtiles as o, osmtiles
+from cldfofflinebrowser.output import ZipSink
 
 
 @pytest.mark.parametrize(
@@ -157,8 +160,8 @@ def test_iter_area_tiles(n: float, w: float, s: float, e: float, zoom: int, expe
 
 
 def test_download_tiles(tmp_path, mocker, caplog):
-    def urlretrieve(_, p):
-        p.write_text('x', encoding='utf8')
+    def urlopen(_):
+        return io.BytesIO(b'x')
 
     @contextlib.contextmanager
     def tileserver(_):
@@ -167,7 +170,7 @@ def test_download_tiles(tmp_path, mocker, caplog):
                 return None
         yield TS()
 
-    mocker.patch('cldfofflinebrowser.osmtiles.urlretrieve', urlretrieve)
+    mocker.patch('cldfofflinebrowser.output.urlopen', urlopen)
     mocker.patch('cldfofflinebrowser.osmtiles.TileServer', tileserver)
 
     with caplog.at_level(logging.INFO):
@@ -180,6 +183,11 @@ def test_download_tiles(tmp_path, mocker, caplog):
     res = osmtiles.download_tiles(tmp_path, tmp_path, [(12.1, 23.3)], 3, 1, None)
     assert res == 0, 'all already there'
 
+    with ZipSink(tmp_path / 'tiles.zip') as sink:
+        assert osmtiles.download_tiles(tmp_path, sink, [(12.1, 23.3)], 3, 1, None) == 4
+    with zipfile.ZipFile(tmp_path / 'tiles.zip') as zf:
+        assert all(n.startswith('tiles/') for n in zf.namelist())
+
 
 def test_TileServer(tmp_path):
     from urllib.request import urlretrieve
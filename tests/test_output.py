@@ -0,0 +1,127 @@
+import io
+import zipfile
+import threading
+
+import pytest
+
+from cldfofflinebrowser.output import (
+    get_sink, DirectorySink, ZipSink, MemorySink, CountingSink,
+)
+
+
+def test_DirectorySink(tmp_path):
+    with get_sink(tmp_path / 'out') as sink:
+        assert isinstance(sink, DirectorySink)
+        sink.write_text('a/b.txt', 'äöü')
+        assert sink.exists('a/b.txt')
+        sink.copy_tree(tmp_path / 'out' / 'a', 'c')
+    assert tmp_path.joinpath('out', 'c', 'b.txt').read_text(encoding='utf8') == 'äöü'
+
+    # Files written before a failure are kept:
+    with pytest.raises(RuntimeError):
+        with get_sink(tmp_path / 'failed') as sink:
+            sink.write_text('a.txt', '')
+            raise RuntimeError()
+    assert tmp_path.joinpath('failed', 'a.txt').exists()
+
+
+def test_ZipSink(tmp_path):
+    src = tmp_path / 'tile.png'
+    src.write_bytes(b'png')
+    with get_sink(tmp_path / 'out.zip') as sink:
+        assert isinstance(sink, ZipSink)
+        sink.write_text('index.html', '<html>')
+        sink.copy(src, 'tiles/0/0/0.png')
+        assert sink.exists('tiles/0/0/0.png')
+        with pytest.raises(ValueError):
+            sink.write_text('index.html', '')
+
+    with zipfile.ZipFile(tmp_path / 'out.zip') as zf:
+        assert zf.getinfo('index.html').compress_type == zipfile.ZIP_DEFLATED
+        assert zf.getinfo('tiles/0/0/0.png').compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo('index.html').date_time == (1980, 1, 1, 0, 0, 0)
+        assert zf.read('tiles/0/0/0.png') == b'png'
+
+
+def test_ZipSink_retrieve(tmp_path, mocker):
+    sink = ZipSink(tmp_path / 'out.zip')
+
+    class Response(io.BytesIO):
+        def read(self, *args):
+            # The archive must not be locked while downloading, i.e. other threads can write to it.
+            writer = threading.Thread(target=sink.write_text, args=(f'{self.tell()}.html', ''))
+            writer.start()
+            writer.join(timeout=1)
+            assert not writer.is_alive()
+            return super().read(*args)
+
+    def urlopen(_):
+        return Response(b'png')
+
+    mocker.patch('cldfofflinebrowser.output.urlopen', urlopen)
+    with sink:
+        sink.retrieve('http://example.org/tile.png', 'tiles/0/0/0.png')
+    with zipfile.ZipFile(tmp_path / 'out.zip') as zf:
+        assert zf.read('tiles/0/0/0.png') == b'png'
+
+
+def test_ZipSink_deterministic(tmp_path):
+    def write(sink, paths):
+        for path in paths:
+            sink.write_text(path, path * 100)
+
+    for name, order in [('a.zip', [0, 1]), ('b.zip', [1, 0])]:
+        with ZipSink(tmp_path / name) as sink:
+            # Entries are written from several threads, in different order:
+            for i in order:
+                writer = threading.Thread(
+                    target=write, args=(sink, [['data.js', 'b/c.js'], ['a.png', 'x.js']][i]))
+                writer.start()
+                writer.join()
+    assert tmp_path.joinpath('a.zip').read_bytes() == tmp_path.joinpath('b.zip').read_bytes()
+    with zipfile.ZipFile(tmp_path / 'a.zip') as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ['a.png', 'b/c.js', 'data.js', 'x.js']
+        assert zf.read('x.js') == b'x.js' * 100
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['a.zip', 'b.zip']
+
+
+def test_ZipSink_discard(tmp_path):
+    with pytest.raises(RuntimeError):
+        with ZipSink(tmp_path / 'out.zip') as sink:
+            sink.write_text('index.html', '<html>')
+            raise RuntimeError()
+    assert not list(tmp_path.iterdir())
+
+
+def test_MemorySink():
+    sink = MemorySink()
+    sink.write_bytes('x/y.js', b'abc')
+    assert sink.exists('x/y.js')
+    assert sink.files == {'x/y.js': b'abc'}
+
+
+def test_CountingSink(tmp_path):
+    src = tmp_path / 'tile.png'
+    src.write_bytes(b'png')
+    sink = CountingSink(MemorySink())
+    sink.write_bytes('x/y.js', b'abc')
+    sink.copy(src, 'tiles/0/0/0.png')
+    assert sink.exists('tiles/0/0/0.png')
+    assert (sink.files, sink.bytes) == (2, 6)
+    assert sink.sink.files['x/y.js'] == b'abc'
+
+
+def test_DirectorySink_link(tmp_path):
+    src = tmp_path / 'src.txt'
+    src.write_text('abc', encoding='utf8')
+    sink = DirectorySink(tmp_path / 'out')
+    sink.link(src, 'a/b.txt')
+    assert sink.path('a/b.txt').stat().st_ino == src.stat().st_ino
+    # Writing to the sink does not modify the linked file:
+    sink.write_text('a/b.txt', 'xyz')
+    assert src.read_text(encoding='utf8') == 'abc'
+
+    sink = CountingSink(MemorySink())
+    sink.link(src, 'a/b.txt')
+    assert sink.bytes == 3 and sink.sink.files['a/b.txt'] == b'abc'
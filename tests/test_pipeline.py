@@ -0,0 +1,90 @@
+import time
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cldfofflinebrowser.pipeline import (
+    run_phases, bounded_map, ordered_map, batched, check_cancelled, Cancelled,
+)
+
+
+def test_bounded_map():
+    assert list(bounded_map(lambda x: x * 2, range(5))) == [0, 2, 4, 6, 8]
+    assert list(bounded_map(lambda x: x * 2, range(50), workers=4)) == [x * 2 for x in range(50)]
+
+
+def test_ordered_map():
+    consumed = []
+
+    def items():
+        for i in range(50):
+            consumed.append(i)
+            yield i
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = ordered_map(executor, lambda x: x * 2, items(), 4)
+        assert next(results) == 0
+        # Only a window of items is submitted ahead of the results:
+        assert len(consumed) == 5
+        assert list(results) == [x * 2 for x in range(1, 50)]
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
+
+
+def test_run_phases(capsys):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def phase(progress):
+        # Both phases must be running at the same time to pass the barrier.
+        barrier.wait()
+        return len(list(progress(range(20))))
+
+    assert run_phases({'a': phase, 'b': phase}) == {'a': 20, 'b': 20}
+    err = capsys.readouterr().err
+    assert 'a: 20....' in err and 'b: done.' in err
+
+
+def test_run_phases_error():
+    def fail(_):
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        run_phases({'ok': lambda _: None, 'fail': fail})
+
+
+def test_run_phases_cancel():
+    stopped = []
+
+    def fail(_):
+        time.sleep(0.1)
+        raise ValueError()
+
+    def download(progress):
+        try:
+            # Runs "forever", unless cancelled:
+            for _ in progress(bounded_map(lambda x: time.sleep(0.01), itertools.count(), 2)):
+                pass
+        except Cancelled:
+            stopped.append('download')
+            raise
+
+    def render(_):
+        try:
+            for _ in bounded_map(lambda x: time.sleep(0.01), itertools.count()):
+                pass
+        except Cancelled:
+            stopped.append('render')
+            raise
+
+    start = time.perf_counter()
+    with pytest.raises(ValueError):
+        run_phases({'fail': fail, 'download': download, 'render': render})
+    assert time.perf_counter() - start < 5
+    assert sorted(stopped) == ['download', 'render']
+    # Outside of phases, nothing is cancelled:
+    check_cancelled()
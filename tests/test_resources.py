@@ -0,0 +1,67 @@
+import logging
+import pathlib
+import argparse
+
+from pycldf import Dataset
+
+from cldfofflinebrowser.build import build
+from cldfofflinebrowser.osmtiles import Tile
+from cldfofflinebrowser.output import DirectorySink, MemorySink
+from cldfofflinebrowser.resources import Resources, SharedResources
+from cldfofflinebrowser.synthetic import StubTileServer, PNG
+
+DATASET = pathlib.Path(__file__).parent / 'dataset' / 'cldf' / 'Wordlist-metadata.json'
+
+
+def test_Resources(mocker):
+    mocker.patch('cldfofflinebrowser.osmtiles.TileServer', StubTileServer)
+    sink = MemorySink()
+    Resources().add_default_tiles(sink)
+    assert 'tiles/0/0/0.png' in sink.files
+    Resources().add_tiles(
+        None, sink, [(Tile(0, 0, 5), 'tiles/5/0/0.png')], lambda things, **_: things)
+    assert sink.files['tiles/5/0/0.png'] == PNG
+
+
+def test_SharedResources(tmp_path, mocker):
+    class TileServer(StubTileServer):
+        started = 0
+
+        def __enter__(self):
+            TileServer.started += 1
+            return super().__enter__()
+
+    mbtiles = tmp_path / 'world.mbtiles'
+    mbtiles.write_bytes(b'')
+    args = argparse.Namespace(
+        include=None, with_audio=True, log=logging.getLogger(__name__), tiles=mbtiles,
+        max_zoom=5, padding=1, jobs=1, download_jobs=2, chunk_size=0)
+    cldf = Dataset.from_metadata(DATASET)
+    tmp_path.joinpath('shared', 'static').mkdir(parents=True)
+    tmp_path.joinpath('shared', 'static', 'offline.js').write_text('', encoding='utf8')
+    with SharedResources(tmp_path / 'shared', server_class=TileServer) as resources:
+        assert not resources.cache.exists('static/offline.js')
+        for name in ['a', 'b']:
+            build(cldf, DirectorySink(tmp_path / name), args, resources=resources)
+
+        mocker.patch('cldfofflinebrowser.output.urlopen', lambda _: open(DATASET, 'rb'))
+        sink = DirectorySink(tmp_path / 'c')
+        resources.add_audio(cldf, sink, pathlib.PurePosixPath('x.json'), 'http://example.org/x')
+        assert sink.path('x.json').read_bytes() == DATASET.read_bytes()
+    assert TileServer.started == 1
+
+    for name in ['a', 'b']:
+        out = tmp_path / name
+        assert out.joinpath('tiles', '5', '22', '12.png').read_bytes() == PNG
+        assert out.joinpath('static', 'fullscreen.png').stat().st_nlink == 3
+        assert out.joinpath('parameter-1', 'ask-1-1.wav').exists()
+
+    # The cache directory is re-used, but tiles are only taken from it for the same mbtiles file:
+    cached = [(Tile(22, 12, 5), 'tiles/5/22/12.png')]
+    with SharedResources(tmp_path / 'shared', server_class=TileServer) as resources:
+        resources.add_tiles(mbtiles, MemorySink(), cached, lambda things, **_: things)
+    assert TileServer.started == 1
+    mbtiles.write_bytes(b'changed')
+    with SharedResources(tmp_path / 'shared', server_class=TileServer) as resources:
+        resources.add_tiles(mbtiles, MemorySink(), cached, lambda things, **_: things)
+    assert TileServer.started == 2
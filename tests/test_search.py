@@ -0,0 +1,36 @@
+from cldfofflinebrowser.output import DirectorySink
+from cldfofflinebrowser.search import normalize, tokenize, shard_key, search_index, write_index
+
+
+def test_normalize_tokenize():
+    assert tokenize(normalize('Élan-vital aʈi')) == ['elan', 'vital', 'aʈi']
+    assert shard_key('aʈi') == '61-288'
+    assert shard_key('a') == '61'
+
+
+def test_search_index(tmp_path):
+    docs = [
+        ('Blood', ('parameter-1/index.html', 'Blood', 'Parameter')),
+        ('blue blood', ('parameter-2/index.html', 'blue blood', 'Parameter')),
+        (None, ('parameter-3/index.html', '', 'Parameter')),
+    ]
+    shards = search_index(docs)
+    assert set(shards) == {'62-6c'}
+    assert shards['62-6c']['words'] == {'blood': [0, 1], 'blue': [1]}
+
+    assert write_index(DirectorySink(tmp_path), docs) == 1
+    assert 'OFFLINE.search["62-6c"] = ' in \
+        tmp_path.joinpath('search', '62-6c.js').read_text(encoding='utf8')
+
+
+def test_search_index_short_words():
+    docs = [
+        ('水', ('parameter-1/index.html', '水', 'Parameter')),
+        ('a blood', ('parameter-2/index.html', 'a blood', 'Parameter')),
+    ]
+    shards = search_index(docs)
+    # The client loads the shard `shard_key(word)` for each word of a query, including short ones:
+    for query, url in [('水', 'parameter-1/index.html'), ('a blood', 'parameter-2/index.html')]:
+        for word in tokenize(normalize(query)):
+            shard = shards[shard_key(word)]
+            assert [shard['docs'][i][0] for i in shard['words'][word]] == [url]
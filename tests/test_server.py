@@ -0,0 +1,70 @@
+import logging
+import pathlib
+import threading
+import urllib.error
+from urllib.request import urlopen
+
+import pytest
+from pycldf import Dataset
+
+from cldfbench.__main__ import main
+
+from cldfofflinebrowser.create import Data
+from cldfofflinebrowser.server import Preview, PreviewServer
+
+
+@pytest.fixture
+def preview(tmp_path):
+    cldf = Dataset.from_metadata(
+        pathlib.Path(__file__).parent / 'dataset' / 'cldf' / 'Wordlist-metadata.json')
+    tmp_path.joinpath('0', '0').mkdir(parents=True)
+    tmp_path.joinpath('0', '0', '1.png').write_bytes(b'png')
+    return Preview(
+        cldf,
+        Data.from_dataset(cldf, with_audio=True, log=logging.getLogger(__name__)),
+        chunk_size=1,
+        tiles_dirs=[tmp_path],
+        cache_size=2)
+
+
+def test_Preview(preview):
+    assert b'<html' in preview.get('index.html')
+    assert preview.get('data.js').startswith(b'data = ')
+    assert b'<html' in preview.get('parameter-1/index.html')
+    assert preview.get('language-ask/data-1.js').startswith(b'OFFLINE.chunks[1]')
+    assert preview.get('navigation.js').startswith(b'navigation = ')
+    assert preview.get('search/62-6c.js')
+    assert preview.get('static/fullscreen.png')
+    assert preview.get('static/offline.js') is None
+    assert preview.get('tiles/0/0/0.png')
+    assert preview.get('tiles/0/0/1.png') == b'png'
+    assert preview.get('parameter-1/ask-1-1.wav')
+    for path in ['', '../setup.py', 'static/../../../setup.py', 'parameter-x/index.html',
+                 'language-ask/x.js', 'tiles/9/9/9.png']:
+        assert preview.get(path) is None
+
+
+def test_PreviewServer(preview):
+    with PreviewServer(preview, port=0) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = 'http://localhost:{}/'.format(server.server_address[1])
+        try:
+            with urlopen(url) as res:
+                assert res.headers['Content-Type'] == 'text/html; charset=utf-8'
+                assert b'<html' in res.read()
+            with urlopen(url + 'parameter-1') as res:
+                assert res.url == url + 'parameter-1/'
+            with pytest.raises(urllib.error.HTTPError):
+                urlopen(url + 'parameter-x/')
+        finally:
+            server.shutdown()
+
+
+def test_serve(mocker, caplog):
+    mocker.patch('cldfofflinebrowser.server.PreviewServer.serve_forever')
+    with caplog.at_level(logging.INFO):
+        main([
+            'offline.serve',
+            str(pathlib.Path(__file__).parent / 'dataset' / 'cldf'),
+            '--port', '0'])
+    assert 'Serving' in caplog.records[-1].message
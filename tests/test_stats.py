@@ -0,0 +1,33 @@
+import logging
+
+from cldfofflinebrowser.output import MemorySink
+from cldfofflinebrowser.stats import Stats
+
+
+def test_Stats(tmp_path, caplog):
+    stats = Stats()
+    sink = MemorySink()
+    with stats.phase('a', sink) as phase:
+        for i in phase.count(range(3)):
+            phase.sink.write_bytes(f'{i}.txt', b'abc')
+    with stats.phase('b') as phase:
+        pass
+
+    report = stats.report()
+    assert report['phases']['a']['items'] == 3
+    assert report['phases']['a']['bytes'] == 9
+    assert 'bytes' not in report['phases']['b']
+    assert report['total']['files'] == len(sink.files) == 3
+    assert report['total']['peak_rss_mb'] > 0
+
+    stats.write(tmp_path / 'stats.json')
+    assert tmp_path.joinpath('stats.json').exists()
+    with caplog.at_level(logging.INFO):
+        stats.log(logging.getLogger(__name__))
+    assert len(caplog.records) == 5
+
+
+def test_Stats_without_output():
+    sink = MemorySink()
+    with Stats(count_output=False).phase('a', sink) as phase:
+        assert phase.sink is sink
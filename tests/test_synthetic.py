@@ -0,0 +1,38 @@
+import logging
+
+from pycldf import Dataset
+
+from cldfofflinebrowser import osmtiles
+from cldfofflinebrowser.create import Data
+from cldfofflinebrowser.output import MemorySink
+from cldfofflinebrowser.synthetic import PNG, Scale, StubTileServer, write_wordlist
+
+
+def test_write_wordlist(tmp_path):
+    scale = Scale(languages=5, parameters=3, forms=20, media=4, spread=2, center=(10, 20))
+    cldf = Dataset.from_metadata(write_wordlist(tmp_path / 'cldf', scale))
+    assert cldf.validate()
+    data = Data.from_dataset(cldf, with_audio=True, log=logging.getLogger(__name__))
+    assert len(data.languages) == 5
+    assert len(data.forms) == 20
+    assert len(data.form2audio) == 4
+    assert all(9 <= lang['latitude'] <= 11 for lang in data.languages.values())
+
+    sink = MemorySink()
+    for target, url in data.iter_missing_audio(cldf, sink):
+        assert cldf.directory.joinpath(url).exists()
+        assert target.suffix == '.mp3'
+
+    # Datasets are reproducible:
+    write_wordlist(tmp_path / 'other', scale)
+    assert tmp_path.joinpath('cldf', 'forms.csv').read_text(encoding='utf8') == \
+        tmp_path.joinpath('other', 'forms.csv').read_text(encoding='utf8')
+
+
+def test_StubTileServer():
+    sink = MemorySink()
+    res = osmtiles.download_tiles(
+        None, sink, [(12.1, 23.3)], 3, 1,
+        progress=lambda things, **_: things, workers=2, server_class=StubTileServer)
+    assert res == 4
+    assert sink.files['tiles/3/4/3.png'] == PNG
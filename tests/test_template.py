@@ -1,14 +1,62 @@
 import pathlib
 
-from cldfofflinebrowser.template import _render
+from cldfofflinebrowser.output import DirectorySink
+from cldfofflinebrowser.template import (
+    _render, _chunked, _init_worker, _render_page, _render_pages, render_directory, get_env,
+)
 
 
 def test_render(tmpdir):
     vars = {'title': 'äüöß'}
-    _render(str(tmpdir), 'index.html', **vars)
+    _render(DirectorySink(str(tmpdir)), 'index.html', 'index.html', **vars)
     out = pathlib.Path(str(tmpdir)).joinpath('index.html')
     assert out.exists()
+    assert 'äüöß' in out.read_text(encoding='utf8')
 
-    out = out.parent / 'other.html'
-    _render(out, 'index.html')
-    assert out.exists()
+    _render(DirectorySink(str(tmpdir)), 'other.html', 'index.html')
+    assert out.parent.joinpath('other.html').exists()
+
+
+def test_chunked():
+    data = {
+        'parameters': {'a': 1, 'b': 2, 'c': 3},
+        'forms': {'a': [1, 2], 'b': [3], 'c': [4, 5, 6]},
+    }
+    chunks = _chunked(data, 3)
+    assert [list(c['forms']) for c in chunks] == [['a', 'b'], ['c']]
+    assert chunks[1]['parameters'] == {'c': 3}
+    assert len(_chunked(data, 1)) == 3
+
+
+def test_render_directory_chunked(tmp_path):
+    render_directory(
+        DirectorySink(tmp_path),
+        'parameter',
+        'p',
+        {'name': 'P', 'has_audio': False},
+        {'forms': {'l1': [{'form': 'x', 'audio': None}], 'l2': [{'form': 'y', 'audio': None}]}},
+        5,
+        {'languages_by_id': {'l1': {'name': 'L1'}, 'l2': {'name': 'L2'}}},
+        chunk_size=1)
+    page = tmp_path / 'parameter-p'
+    assert page.joinpath('data-1.js').exists()
+    assert '"chunks":[1,1]' in page.joinpath('data.js').read_text(encoding='utf8')
+    assert 'chunked-table' in page.joinpath('index.html').read_text(encoding='utf8')
+
+
+def test_render_page(tmp_path):
+    page = ('language', 'l', {'name': 'L', 'has_audio': False}, {'parameters': {}, 'forms': {}})
+    _init_worker(None, 5, {}, 0)
+    files, = _render_pages([page])
+    assert set(files) == {'language-l/data.js', 'language-l/index.html'}
+
+    _init_worker(DirectorySink(tmp_path), 5, {}, 0)
+    assert _render_page(page) is None
+    assert tmp_path.joinpath('language-l', 'index.html').exists()
+
+
+def test_get_env():
+    env = get_env()
+    assert env is get_env()
+    assert env.bytecode_cache is not None
+    assert env.get_template('index.html')